@@ -1,6 +1,9 @@
+import asyncio
 import logging
+import os
 import sys
-from typing import Optional
+import time
+from typing import Dict, List, Optional, Union
 
 import aiohttp
 import discord
@@ -10,11 +13,27 @@ from discord.ext.commands import AutoShardedBot as DiscordBot
 
 from common.components.buttons.groupjoin import GroupJoin
 from common.components.buttons.groupleave import GroupLeave
+from common.components.buttons.grouplist import GroupListPage
 from common.components.buttons.groupmembers import GroupMembers
+from common.components.buttons.groupopen import GroupOpen
 from common.components.buttons.grouprefresh import GroupRefresh
 from common.database import Database
+from common.functions.cluster import ClusterClient
+from common.functions.members import MemberResolver
+from common.functions.ping import PingDispatcher
+from common.functions.roles import RoleSync
+from common.functions.tracing import TracedCommandTree
+from common.functions.watchdog import LoopWatchdog
 from config import config
 
+EMOJI_CHECK_INTERVAL = 30
+EXTENSION_PATHS = ["modules/events", "modules/cogs"]
+# Used when emojis.yml doesn't set these, so installs from before they were configurable keep their buttons
+DEFAULT_EMOJIS = {
+    "buttons.members": 1176360845295489024,
+    "buttons.refresh": 1288239757645709352,
+}
+
 
 def get_banner():
     banner = open("common/assets/banner.txt")
@@ -24,31 +43,145 @@ def get_banner():
 class Bot(DiscordBot):
     async def setup_hook(self):
         self.session = aiohttp.ClientSession()
+        self.watchdog.start()
+        self.add_listener(self.watchdog.on_interaction)
+        if self.cluster:
+            self.cluster.start()
         self.db: Database = await Database.create()
-        self.add_dynamic_items(GroupJoin, GroupLeave, GroupMembers, GroupRefresh)
-        for ext in self.initial_extensions:
+        self.reload_emojis()
+        self.role_sync = RoleSync(self)
+        self.db.membership_listeners.append(self.role_sync.queue)
+        self.role_sync.start()
+        self.add_dynamic_items(GroupJoin, GroupLeave, GroupMembers, GroupRefresh, GroupListPage, GroupOpen)
+        await self.load_initial_extensions()
+
+    async def _load_timed(self, ext: str) -> bool:
+        start = time.perf_counter()
+        try:
             await self.load_extension(ext)
+        except Exception as e:
+            self.log.error(f"Failed to load {ext}: {repr(e)}")
+            return False
+        self.extension_times[ext] = (time.perf_counter() - start) * 1000
+        self.log.info(f"Loaded {ext} in {self.extension_times[ext]:.1f}ms")
+        return True
+
+    def discover_extensions(self) -> Dict[str, List[str]]:
+        extensions = {
+            f"{path}/{file}".replace("/", "."): []
+            for path in EXTENSION_PATHS
+            for file in sorted(os.listdir(path))
+            if not file.startswith("_")
+        }
+        for ext, deps in self.extension_dependencies.items():
+            if ext not in extensions:
+                self.log.warning(f"{ext} declares dependencies but wasn't found on disk")
+                continue
+            extensions[ext] = deps
+        return extensions
+
+    async def load_initial_extensions(self):
+        # Extensions whose dependencies are loaded are loaded together, one dependency level at a time
+        remaining = self.discover_extensions()
+        loaded, failed = set(), set()
+        while remaining:
+            blocked = [ext for ext, deps in remaining.items() if any(dep in failed for dep in deps)]
+            for ext in blocked:
+                self.log.error(f"Skipped {ext} because a dependency failed to load")
+                failed.add(ext)
+                del remaining[ext]
+            ready = [ext for ext, deps in remaining.items() if all(dep in loaded for dep in deps)]
+            if not ready:
+                if remaining:
+                    self.log.error(f"Unresolvable extension dependencies: {', '.join(remaining)}")
+                break
+            results = await asyncio.gather(*(self._load_timed(ext) for ext in ready))
+            for ext, ok in zip(ready, results):
+                (loaded if ok else failed).add(ext)
+                del remaining[ext]
+        message = f"Loaded {len(loaded)} extensions"
+        if failed:
+            message += f" | Failed to load {len(failed)} extensions"
+        self.log.info(message)
 
     async def close(self, signum=None, frame=None):
         logging.info("Cleaning up and logging out...")
+        self.pings.cancel_all()
+        self.watchdog.stop()
+        if self.cluster:
+            self.cluster.stop()
+        if self.role_sync:
+            await self.role_sync.stop()
+        if self.db and self.db.buffer:
+            await self.db.buffer.flush()
         await super().close()
+        # Closed after the gateway so interactions still being handled can finish their writes
+        if self.db:
+            await self.db.close()
         await self.session.close()
 
-    def emoji(self, emoji: str):
+    def reload_emojis(self):
         with open("config/emojis.yml", "r") as emojis:
-            emojis = yaml.safe_load(emojis)
-        return self.get_emoji(dictor(emojis, emoji))
+            self._emoji_config = yaml.safe_load(emojis) or {}
+        self._emoji_mtime = os.stat("config/emojis.yml").st_mtime
+        self._emoji_checked = time.monotonic()
+        self._emoji_cache.clear()
 
-    def __init__(self):
-        super().__init__(intents=config.intents, command_prefix=config.prefix)
+    def _refresh_emojis(self):
+        # Stat the file at most every EMOJI_CHECK_INTERVAL seconds instead of reading it per lookup
+        if self._emoji_mtime is None:
+            return self.reload_emojis()
+        if time.monotonic() - self._emoji_checked < EMOJI_CHECK_INTERVAL:
+            return
+        self._emoji_checked = time.monotonic()
+        if os.stat("config/emojis.yml").st_mtime != self._emoji_mtime:
+            self.reload_emojis()
+
+    def emoji(self, emoji: str) -> Optional[Union[discord.Emoji, discord.PartialEmoji]]:
+        self._refresh_emojis()
+        if cached := self._emoji_cache.get(emoji):
+            return cached
+        emoji_id = dictor(self._emoji_config, emoji) or DEFAULT_EMOJIS.get(emoji)
+        if not emoji_id:
+            return None
+        if resolved := self.get_emoji(int(emoji_id)):
+            self._emoji_cache[emoji] = resolved
+            return resolved
+        return discord.PartialEmoji(name=emoji.split(".")[-1], id=int(emoji_id))
+
+    def resolve_emojis(self, *emojis: str) -> Dict[str, Optional[Union[discord.Emoji, discord.PartialEmoji]]]:
+        return {emoji: self.emoji(emoji) for emoji in emojis}
+
+    def __init__(self, shard_ids: Optional[List[int]] = None, shard_count: Optional[int] = None,
+                 cluster_id: Optional[int] = None, ipc=None):
+        options = {"shard_ids": shard_ids, "shard_count": shard_count}
+        if not getattr(config, "chunk_members", True):
+            # Members are resolved on demand through self.member_cache instead of chunked and cached up front
+            options.update(chunk_guilds_at_startup=False, member_cache_flags=discord.MemberCacheFlags.none())
+        super().__init__(intents=config.intents, command_prefix=config.prefix, tree_cls=TracedCommandTree, **options)
 
         # Argument Handling
         self.session = None
         self.db: Optional[Database] = None
+        self.pings = PingDispatcher()
+        self.member_cache = MemberResolver(getattr(config, "member_cache_size", 10000))
+        self.role_sync: Optional[RoleSync] = None
+        self.watchdog = LoopWatchdog(self, threshold=getattr(config, "loop_lag_threshold", 1.0))
+        self.cluster: Optional[ClusterClient] = ClusterClient(self, cluster_id, ipc) if ipc else None
         self.debug: bool = any("debug" in arg.lower() for arg in sys.argv)
 
-        # Commands/extensions
-        self.initial_extensions = ["modules.events.ready"]
+        # Emojis
+        self._emoji_config: dict = {}
+        self._emoji_cache: Dict[str, discord.Emoji] = {}
+        self._emoji_mtime: Optional[float] = None
+        self._emoji_checked: float = 0.0
+
+        # Commands/extensions are discovered from EXTENSION_PATHS, this only orders the ones that need others first
+        self.extension_dependencies: Dict[str, List[str]] = {
+            "modules.cogs.dev": ["modules.events.errors"],
+            "modules.cogs.groups": ["modules.events.errors"],
+        }
+        self.extension_times: Dict[str, float] = {}
 
         # Logging
         discord_log = logging.getLogger("discord")
@@ -3,6 +3,7 @@ import re
 import discord
 
 from common.database import Database
+from common.functions.tracing import traced
 
 
 class GroupJoin(discord.ui.DynamicItem[discord.ui.Button], template=r"groups:join:(?P<id>[0-9a-f-]+)"):
@@ -22,10 +23,9 @@ class GroupJoin(discord.ui.DynamicItem[discord.ui.Button], template=r"groups:joi
         await interaction.response.defer(thinking=True, ephemeral=True)
         return cls(database=interaction.client.db, group_id=match["id"])
 
+    @traced
     async def callback(self, interaction: discord.Interaction) -> None:
         group = await interaction.client.db.get_group(str(interaction.guild_id), self.group_id)
-        members = group.get_members(interaction.guild)
-        if interaction.user in members:
+        if not await group.add_member(str(interaction.user.id)):
             return await interaction.followup.send(f"You're already in `{group.name}`!", ephemeral=True)
-        await group.add_member(str(interaction.user.id))
         await interaction.followup.send(f"You've joined `{group.name}`!", ephemeral=True)
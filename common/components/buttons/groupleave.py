@@ -3,6 +3,7 @@ import re
 import discord
 
 from common.database import Database
+from common.functions.tracing import traced
 
 
 class GroupLeave(discord.ui.DynamicItem[discord.ui.Button], template=r"groups:leave:(?P<id>[0-9a-f-]+)"):
@@ -22,10 +23,9 @@ class GroupLeave(discord.ui.DynamicItem[discord.ui.Button], template=r"groups:le
         await interaction.response.defer(thinking=True, ephemeral=True)
         return cls(database=interaction.client.db, group_id=match["id"])
 
+    @traced
     async def callback(self, interaction: discord.Interaction) -> None:
         group = await interaction.client.db.get_group(str(interaction.guild_id), self.group_id)
-        members = group.get_members(interaction.guild)
-        if interaction.user not in members:
+        if not await group.remove_member(str(interaction.user.id)):
             return await interaction.followup.send(f"You're not in `{group.name}`!", ephemeral=True)
-        await group.remove_member(str(interaction.user.id))
         await interaction.followup.send(f"You've left `{group.name}`!", ephemeral=True)
@@ -0,0 +1,49 @@
+import re
+
+import discord
+
+from common.database import Database
+from common.functions.tracing import traced
+
+
+class GroupListPage(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"groups:list:(?P<user>\d+):(?P<page>\d+):(?P<sort>[a-z]+):(?P<slot>[a-z]+)"
+):
+    # The owner, page and sort live in the custom_id, so no view state is kept and menus survive restarts
+    def __init__(self, database: Database, user_id: int, page: int, sort: str, slot: str, label: str,
+                 disabled: bool = False, style: discord.ButtonStyle = discord.ButtonStyle.grey) -> None:
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=style,
+                custom_id=f"groups:list:{user_id}:{page}:{sort}:{slot}",
+                disabled=disabled
+            )
+        )
+        self.db = database
+        self.user_id = user_id
+        self.page = page
+        self.sort = sort
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match[str], /):
+        return cls(
+            database=interaction.client.db,
+            user_id=int(match["user"]),
+            page=int(match["page"]),
+            sort=match["sort"],
+            slot=match["slot"],
+            label=item.label
+        )
+
+    @traced
+    async def callback(self, interaction: discord.Interaction) -> None:
+        from common.functions.groups import build_group_list
+        if interaction.user.id not in (self.user_id, interaction.client.owner_id):
+            # Other users get their own copy of the menu instead of flipping someone else's
+            await interaction.response.defer(thinking=True, ephemeral=True)
+            em, view = await build_group_list(interaction, self.page, self.sort)
+            return await interaction.followup.send(embed=em, view=view, ephemeral=True)
+        em, view = await build_group_list(interaction, self.page, self.sort, user_id=self.user_id)
+        await interaction.response.edit_message(embed=em, view=view)
@@ -1,16 +1,19 @@
 import re
+from typing import Optional, Union
 
 import discord
 
 from common.database import Database
-from common.functions.paginator import IndexedPagesInteraction
+from common.functions.paginator import GroupMembersPages
+from common.functions.tracing import traced
 
 
 class GroupMembers(discord.ui.DynamicItem[discord.ui.Button], template=r"groups:members:(?P<id>[0-9a-f-]+)"):
-    def __init__(self, database: Database, group_id: str) -> None:
+    def __init__(self, database: Database, group_id: str,
+                 emoji: Optional[Union[discord.Emoji, discord.PartialEmoji]] = None) -> None:
         super().__init__(
             discord.ui.Button(
-                emoji="<:Silhouette:1176360845295489024>",
+                emoji=emoji,
                 label="Members",
                 style=discord.ButtonStyle.grey,
                 custom_id=f"groups:members:{group_id}"
@@ -24,14 +27,17 @@ class GroupMembers(discord.ui.DynamicItem[discord.ui.Button], template=r"groups:
         await interaction.response.defer(thinking=True, ephemeral=True)
         return cls(database=interaction.client.db, group_id=match["id"])
 
+    @traced
     async def callback(self, interaction: discord.Interaction) -> None:
         group = await self.db.get_group(str(interaction.guild.id), self.group_id)
-        entries = [f"<@{x.id}> `[{x}]`" for x in group.get_members(interaction.guild)]
-        if not entries:
+        per_page = 12
+        first_page, total = await self.db.get_group_members_page(str(interaction.guild.id), self.group_id, 0, per_page)
+        if not total:
             em = discord.Embed(color=interaction.client.config.colors["error"])
             em.description = "Nobody has joined this group!"
             return await interaction.followup.send(embed=em)
         em = discord.Embed(color=interaction.client.config.colors["main"])
         em.set_author(name=f"{group.name} Members")
-        pages = IndexedPagesInteraction(entries=entries, interaction=interaction, embed=em)
+        pages = GroupMembersPages(self.group_id, total, first_page, interaction=interaction, embed=em,
+                                  per_page=per_page)
         await pages.start()
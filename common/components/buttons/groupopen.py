@@ -0,0 +1,34 @@
+import re
+
+import discord
+
+from common.database import Database
+from common.functions.tracing import traced
+
+
+class GroupOpen(discord.ui.DynamicItem[discord.ui.Button], template=r"groups:open:(?P<id>[0-9a-f-]+)"):
+    def __init__(self, database: Database, group_id: str, label: str = "Open", disabled: bool = False) -> None:
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=discord.ButtonStyle.grey,
+                custom_id=f"groups:open:{group_id}",
+                disabled=disabled
+            )
+        )
+        self.db = database
+        self.group_id = group_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, _item: discord.ui.Button, match: re.Match[str], /):
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        return cls(database=interaction.client.db, group_id=match["id"])
+
+    @traced
+    async def callback(self, interaction: discord.Interaction) -> None:
+        group = await self.db.get_group(str(interaction.guild_id), self.group_id)
+        if not group:
+            return await interaction.followup.send("Group not found!", ephemeral=True)
+        from common.functions.groups import build_group_info
+        em, view = await build_group_info(interaction, group)
+        await interaction.followup.send(embed=em, view=view, ephemeral=True)
@@ -1,15 +1,19 @@
 import re
+from typing import Optional, Union
 
 import discord
 
 from common.database import Database
+from common.functions.tracing import traced
 
 
 class GroupRefresh(discord.ui.DynamicItem[discord.ui.Button], template=r"groups:refresh:(?P<id>[0-9a-f-]+)"):
-    def __init__(self, database: Database, group_id: str) -> None:
+    def __init__(self, database: Database, group_id: str,
+                 emoji: Optional[Union[discord.Emoji, discord.PartialEmoji]] = None) -> None:
         super().__init__(
             discord.ui.Button(
-                emoji="<:Refresh:1288239757645709352>",
+                emoji=emoji,
+                label=None if emoji else "Refresh",
                 style=discord.ButtonStyle.grey,
                 custom_id=f"groups:refresh:{group_id}"
             )
@@ -21,6 +25,7 @@ class GroupRefresh(discord.ui.DynamicItem[discord.ui.Button], template=r"groups:
     async def from_custom_id(cls, interaction: discord.Interaction, _item: discord.ui.Button, match: re.Match[str], /):
         return cls(database=interaction.client.db, group_id=match["id"])
 
+    @traced
     async def callback(self, interaction: discord.Interaction) -> None:
         group = await interaction.client.db.get_group(str(interaction.guild_id), self.group_id)
         if not group:
@@ -1,13 +1,24 @@
+import asyncio
 import logging
 import os
-from typing import Optional
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
 
 import motor.motor_asyncio
 import pymongo.errors
 from motor.core import AgnosticCollection, AgnosticDatabase
 
+from common.database.buffer import WriteBuffer
 from common.database.groups import Group
 from common.database.guilds import Guild
+from common.database.watcher import ChangeWatcher
+from common.functions.cache import LRUCache
+from common.functions.text import normalize_text
+
+
+GROUP_SORTS = {
+    "name": {"normalized_name": 1},
+    "members": {"member_count": -1, "normalized_name": 1},
+}
 
 
 class Database:
@@ -26,6 +37,15 @@ class Database:
         self.client = motor.motor_asyncio.AsyncIOMotorClient(self.uri)
         self.database: AgnosticDatabase = self.client[os.getenv("DB_NAME")]
         self.guilds: Optional[AgnosticCollection] = None
+        self.groups: Optional[AgnosticCollection] = None
+        self.memberships: Optional[AgnosticCollection] = None
+        cache_ttl = os.getenv("DB_CACHE_TTL", 300)
+        self.cache = LRUCache(int(os.getenv("DB_CACHE_SIZE", 1024)), float(cache_ttl) if cache_ttl else None)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.membership_listeners: List[Callable[[Group, str, bool], None]] = []
+        write_behind = os.getenv("DB_WRITE_BEHIND")
+        self.buffer: Optional[WriteBuffer] = WriteBuffer(self, float(write_behind)) if write_behind else None
+        self.watcher = ChangeWatcher(self)
 
     #############################################
     # Core operations                           #
@@ -37,13 +57,15 @@ class Database:
         try:
             await db._init()
             db.log.info(f"Mongo connected to {db.database.name}!")
+            # Invalidates cached guilds when another process writes to them
+            db.watcher.start()
         except Exception as e:
             db.log.error(f"Failed to initialize database: {e}")
             raise
         return db
 
     async def _init(self):
-        collections = ["guilds"]
+        collections = ["guilds", "groups", "memberships"]
         for collection_name in collections:
             try:
                 await self.database.create_collection(collection_name)
@@ -54,19 +76,176 @@ class Database:
                 self.log.error(f"Failed to create collection {collection_name}: {e}")
                 raise
             setattr(self, collection_name, self.database[collection_name])
+        await self.groups.create_index([("guild_id", 1), ("normalized_name", 1)], unique=True)
+        await self.memberships.create_index([("guild_id", 1), ("member_id", 1)], unique=True)
+        if await self.guilds.find_one({"groups": {"$exists": True}}, {"_id": 1}):
+            self.log.warning("Found guilds with embedded groups, run `python manage.py migrategroups`")
+
+    async def close(self):
+        self.watcher.stop()
+        if self.buffer is not None:
+            await self.buffer.close()
+        self.client.close()
+
+    async def _settle(self):
+        # Reads that are answered entirely by Mongo need buffered writes to land first
+        if self.buffer is not None:
+            await self.buffer.flush()
+
+    def _overlay(self, group: Group) -> Group:
+        return self.buffer.overlay(group) if self.buffer is not None else group
+
+    async def _coalesce(self, key: Hashable, factory: Callable[[], Awaitable]):
+        # Concurrent lookups for the same key share a single in-flight query
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def dispatch_membership(self, group: Group, member: str, joined: bool):
+        for listener in self.membership_listeners:
+            listener(group, member, joined)
+
+    #############################################
+    # Lookups                                   #
+    #############################################
 
-    #
     async def get_guild(self, guild_id: str) -> Guild:
-        guild_data = await self.guilds.find_one({"_id": guild_id})
+        if guild := self.cache.get(guild_id):
+            return guild
+        return await self._coalesce(("guild", guild_id), lambda: self._load_guild(guild_id))
+
+    async def _load_guild(self, guild_id: str) -> Guild:
+        guild_data, groups = await asyncio.gather(
+            self.guilds.find_one({"_id": guild_id}, {"groups": 0}),
+            self.groups.find({"guild_id": guild_id}).to_list(None)
+        )
         if guild_data:
-            return Guild.from_existing(self, guild_id, dict(guild_data))
+            guild = Guild.from_existing(self, guild_id, {**guild_data, "groups": groups})
+            for group in guild.groups:
+                self._overlay(group)
+            self.cache.set(guild_id, guild)
+            return guild
         new_guild = Guild.create(self, guild_id)
         await new_guild.save()
+        self.cache.set(guild_id, new_guild)
         return new_guild
 
-    async def get_group(self, guild_id: str, group_id: str) -> Optional[Group]:
-        guild = await self.get_guild(guild_id)
-        for group in guild.groups:
-            if group.id == group_id:
-                return group
-        return None
+    async def get_group(self, guild_id: str, group_id: str, refresh: bool = False) -> Optional[Group]:
+        if not refresh and (guild := self.cache.get(guild_id)):
+            return next((group for group in guild.groups if group.id == group_id), None)
+        group = await self._coalesce(("group", guild_id, group_id), lambda: self._load_group(guild_id, group_id))
+        if refresh and group:
+            group._sync_cache()
+        return group
+
+    async def _load_group(self, guild_id: str, group_id: str) -> Optional[Group]:
+        group_data = await self.groups.find_one({"_id": group_id, "guild_id": guild_id})
+        if not group_data:
+            return None
+        return self._overlay(Group(db=self, **group_data))
+
+    async def get_group_page(self, guild_id: str, page: int, per_page: int = 5,
+                             sort: str = "name") -> Tuple[List[dict], int]:
+        # Returns one page of group summaries (member counts instead of member lists) and the total
+        if guild := self.cache.get(guild_id):
+            groups = [
+                {**group.to_dict(), "member_count": len(group.members)}
+                for group in guild.groups
+            ]
+            groups.sort(key=lambda group: tuple(
+                group[key] if direction > 0 else -group[key] for key, direction in GROUP_SORTS[sort].items()
+            ))
+            return groups[page * per_page:(page + 1) * per_page], len(groups)
+        await self._settle()
+        pipeline = [
+            {"$match": {"guild_id": guild_id}},
+            {"$project": {
+                "name": 1, "normalized_name": 1, "description": 1, "creator": 1, "version": 1,
+                "member_count": {"$size": "$members"}
+            }},
+            {"$sort": GROUP_SORTS[sort]},
+            {"$facet": {
+                "total": [{"$count": "count"}],
+                "groups": [{"$skip": page * per_page}, {"$limit": per_page}]
+            }}
+        ]
+        result = (await self.groups.aggregate(pipeline).to_list(None))[0]
+        total = result["total"][0]["count"] if result["total"] else 0
+        return result["groups"], total
+
+    async def get_group_members_page(self, guild_id: str, group_id: str, skip: int,
+                                     limit: int) -> Tuple[List[str], int]:
+        # Returns one window of a group's member IDs and the group's total member count
+        if guild := self.cache.get(guild_id):
+            group = next((group for group in guild.groups if group.id == group_id), None)
+            if group is None:
+                return [], 0
+            return group.members[skip:skip + limit], len(group.members)
+        await self._settle()
+        pipeline = [
+            {"$match": {"_id": group_id, "guild_id": guild_id}},
+            {"$project": {"members": {"$slice": ["$members", skip, limit]}, "member_count": {"$size": "$members"}}}
+        ]
+        result = await self.groups.aggregate(pipeline).to_list(None)
+        if not result:
+            return [], 0
+        return result[0]["members"], result[0]["member_count"]
+
+    async def get_member_groups(self, guild_id: str, member_id: str) -> List[Group]:
+        await self._settle()
+        membership = await self.memberships.find_one({"guild_id": guild_id, "member_id": member_id})
+        if not membership or not membership["groups"]:
+            return []
+        if guild := self.cache.get(guild_id):
+            group_ids = set(membership["groups"])
+            return [group for group in guild.groups if group.id in group_ids]
+        groups = await self.groups.find({"_id": {"$in": membership["groups"]}, "guild_id": guild_id}).to_list(None)
+        groups = [self._overlay(Group(db=self, **group_data)) for group_data in groups]
+        return sorted(groups, key=lambda group: group.name.lower())
+
+    #############################################
+    # Maintenance                               #
+    #############################################
+
+    async def migrate_groups(self) -> int:
+        # Streams guilds that still embed their groups into the groups collection
+        migrated = 0
+        async for guild_data in self.guilds.find({"groups": {"$exists": True}}):
+            guild_id = guild_data["_id"]
+            operations = [
+                pymongo.ReplaceOne(
+                    {"_id": group["_id"]},
+                    {**group, "guild_id": guild_id, "normalized_name": normalize_text(group["name"])},
+                    upsert=True
+                )
+                for group in guild_data["groups"]
+            ]
+            try:
+                if operations:
+                    await self.groups.bulk_write(operations, ordered=False)
+            except pymongo.errors.BulkWriteError as e:
+                self.log.error(f"Failed to migrate groups for guild {guild_id}: {e.details['writeErrors']}")
+                continue
+            await self.guilds.update_one({"_id": guild_id}, {"$unset": {"groups": ""}})
+            self.cache.invalidate(guild_id)
+            migrated += len(operations)
+        await self.rebuild_memberships()
+        return migrated
+
+    async def rebuild_memberships(self):
+        # Rebuilds the member -> groups reverse index from the groups collection into a temporary collection,
+        # then swaps it in so readers never see a partially built index
+        await self._settle()
+        pipeline = [
+            {"$unwind": "$members"},
+            {"$group": {"_id": {"guild_id": "$guild_id", "member_id": "$members"}, "groups": {"$addToSet": "$_id"}}},
+            {"$project": {"_id": 0, "guild_id": "$_id.guild_id", "member_id": "$_id.member_id", "groups": 1}},
+            {"$out": "memberships_rebuild"}
+        ]
+        await self.groups.aggregate(pipeline).to_list(None)
+        rebuilt = self.database["memberships_rebuild"]
+        await rebuilt.create_index([("guild_id", 1), ("member_id", 1)], unique=True)
+        await rebuilt.rename("memberships", dropTarget=True)
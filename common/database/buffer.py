@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+import pymongo
+import pymongo.errors
+
+
+class WriteBuffer:
+    def __init__(self, db: Any, window: float):
+        self.db = db
+        self.window = window
+        self.log = logging.getLogger("database")
+        # group_id -> {member_id: joined}, only the last change per member inside a window is written
+        self._pending: Dict[str, Dict[str, bool]] = {}
+        self._flushing: Dict[str, Dict[str, bool]] = {}
+        self._guilds: Dict[str, str] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def queue(self, group, member: str, joined: bool):
+        self._pending.setdefault(group.id, {})[member] = joined
+        self._guilds[group.id] = group.guild_id
+        self._schedule()
+
+    def _schedule(self):
+        if self._task is None or self._task.done() or self._task is asyncio.current_task():
+            self._task = asyncio.create_task(self._flush_later())
+
+    def overlay(self, group):
+        # Applies changes that haven't reached Mongo yet to a freshly loaded group
+        for changes in (self._flushing.get(group.id), self._pending.get(group.id)):
+            for member, joined in (changes or {}).items():
+                group.apply_member(member, joined)
+        return group
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        await self.flush()
+
+    async def _write_group(self, group_id: str, changes: Dict[str, bool]) -> Optional[dict]:
+        added = [member for member, joined in changes.items() if joined]
+        removed = [member for member, joined in changes.items() if not joined]
+        # One update per group and batch, bumping the version once like every other write
+        return await self.db.groups.find_one_and_update(
+            {"_id": group_id},
+            [{"$set": {
+                "members": {"$concatArrays": [
+                    {"$filter": {"input": "$members", "cond": {"$not": {"$in": ["$$this", {"$literal": removed}]}}}},
+                    {"$filter": {"input": {"$literal": added}, "cond": {"$not": {"$in": ["$$this", "$members"]}}}}
+                ]},
+                "version": {"$add": ["$version", 1]}
+            }}],
+            projection={"version": 1},
+            return_document=pymongo.ReturnDocument.AFTER
+        )
+
+    def _synced(self, group_id: str, version: int):
+        self.db.watcher.record(group_id, version)
+        guild_id = self._guilds.get(group_id)
+        guild = self.db.cache.peek(guild_id)
+        group = next((group for group in guild.groups if group.id == group_id), None) if guild else None
+        if group is None:
+            return
+        if version != group.version + 1:
+            # Another process wrote to the group in between, so the cached copy is missing its change
+            self.db.cache.invalidate(guild_id)
+        else:
+            group.version = version
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            group_ids = list(self._flushing)
+            results = await asyncio.gather(
+                *(self._write_group(group_id, self._flushing[group_id]) for group_id in group_ids),
+                return_exceptions=True
+            )
+            failed, written = [], []
+            for group_id, result in zip(group_ids, results):
+                if isinstance(result, Exception):
+                    self.log.error(f"Failed to flush buffered membership writes for group {group_id}: {result}")
+                    failed.append(group_id)
+                    continue
+                written.append(group_id)
+                if result is not None:
+                    self._synced(group_id, result["version"])
+            membership_ops = [
+                pymongo.UpdateOne(
+                    {"guild_id": self._guilds.get(group_id), "member_id": member},
+                    {"$addToSet" if joined else "$pull": {"groups": group_id}},
+                    upsert=joined
+                )
+                for group_id in written
+                for member, joined in self._flushing[group_id].items()
+            ]
+            try:
+                if membership_ops:
+                    await self.db.memberships.bulk_write(membership_ops, ordered=False)
+            except pymongo.errors.PyMongoError as e:
+                self.log.error(f"Failed to flush {len(membership_ops)} buffered membership index writes: {e}")
+                failed.extend(written)
+            # Changes queued since the flush started are newer and win over the failed ones
+            for group_id in failed:
+                pending = self._pending.setdefault(group_id, {})
+                for member, joined in self._flushing[group_id].items():
+                    pending.setdefault(member, joined)
+            self._guilds = {group_id: self._guilds[group_id] for group_id in self._pending}
+            self._flushing = {}
+        if self._pending and not self._closed:
+            self._schedule()
+
+    async def close(self):
+        self._closed = True
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        await self.flush()
+        if self._pending:
+            self.log.error(f"Dropped buffered membership writes for {len(self._pending)} groups on shutdown")
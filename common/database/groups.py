@@ -1,8 +1,13 @@
+import time
 import uuid
-from dataclasses import dataclass, field, asdict
-from typing import Any, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Set
 
 import discord
+import pymongo.errors
+from pymongo import ReturnDocument
+
+from ..functions.text import normalize_text
 
 
 @dataclass
@@ -14,56 +19,174 @@ class Group:
     description: str
     guild_id: Optional[str] = None
     members: List[str] = field(default_factory=list)
+    normalized_name: Optional[str] = None
+    role_id: Optional[str] = None
+    version: int = 0
+    _member_ids: Set[int] = field(default_factory=set, init=False, repr=False, compare=False)
+    fetched_at: float = field(default_factory=time.monotonic, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not self.normalized_name:
+            self.normalized_name = normalize_text(self.name)
+        self._member_ids = {int(member) for member in self.members}
 
     @property
     def id(self):
         return self._id
 
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
     def to_dict(self):
         return {
             "_id": self._id,
+            "guild_id": self.guild_id,
             "creator": self.creator,
             "name": self.name,
             "description": self.description,
-            "members": self.members
+            "members": self.members,
+            "normalized_name": self.normalized_name,
+            "role_id": self.role_id,
+            "version": self.version
         }
 
     @classmethod
-    def create(cls, db, creator: str, name: str, description: str) -> "Group":
+    def create(cls, db, creator: str, name: str, description: str, guild_id: Optional[str] = None) -> "Group":
         new_id = str(uuid.uuid4())
-        group = cls(db=db, _id=new_id, creator=creator, name=name, description=description)
+        group = cls(db=db, _id=new_id, creator=creator, name=name, description=description, guild_id=guild_id)
         return group
 
     async def save(self):
-        group_dict = asdict(self)
-        group_dict.pop('db')
-        group_dict.pop('guild_id')
-        await self.db.guilds.update_one(
-            {"_id": self.guild_id},
-            {"$push": {"groups": group_dict}}
-        )
+        # Uniqueness is enforced by the (guild_id, normalized_name) index
+        try:
+            await self.db.groups.insert_one(self.to_dict())
+        except pymongo.errors.DuplicateKeyError:
+            raise ValueError("Group with that name already exists!")
+        self.db.watcher.record(self._id, self.version)
 
     @classmethod
     async def from_existing(cls, db, guild_id: str, data: dict) -> "Group":
-        return cls(db=db, guild_id=guild_id, **data)
+        return cls(db=db, **{**data, "guild_id": guild_id})
 
     async def update_fields(self, **kwargs):
-        allowed_fields = set(self.__annotations__.keys()) - {'guild_id', 'db'}
-        update_data = {f'groups.$.{key}': value for key, value in kwargs.items() if key in allowed_fields}
-        await self.db.guilds.update_one(
-            {"_id": self.guild_id, "groups._id": self._id},
-            {"$set": update_data}
+        allowed_fields = set(self.__annotations__.keys()) - {'guild_id', 'db', '_member_ids', 'fetched_at', 'version'}
+        if "name" in kwargs:
+            kwargs["normalized_name"] = normalize_text(kwargs["name"])
+        update_data = {key: value for key, value in kwargs.items() if key in allowed_fields}
+        previous = self.version
+        result = await self.db.groups.find_one_and_update(
+            {"_id": self._id},
+            {"$set": update_data, "$inc": {"version": 1}},
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        for key, value in kwargs.items():
+            if key in allowed_fields:
+                setattr(self, key, value)
+        if "members" in kwargs:
+            self._member_ids = {int(member) for member in self.members}
+        if result:
+            self.version = result["version"]
+            self._record_write(previous)
+        self._sync_cache()
+
+    def _record_write(self, previous: int):
+        # Lets the change stream skip this write, a gap in versions means another process wrote in between
+        self.db.watcher.record(self._id, self.version)
+        if self.version != previous + 1:
+            self.db.cache.invalidate(self.guild_id)
+
+    def _sync_cache(self):
+        guild = self.db.cache.peek(self.guild_id)
+        if guild is None:
+            return
+        for index, group in enumerate(guild.groups):
+            if group.id == self._id:
+                guild.groups[index] = self
+                if guild._search is not None:
+                    guild._search.add(self._id, self.name)
+                return
+        self.db.cache.invalidate(self.guild_id)
+
+    def apply_member(self, member: str, joined: bool) -> bool:
+        # Updates local state only, returning whether anything changed. The version is left to whoever writes
+        # the change, so it always matches the version Mongo assigns
+        if joined == self.has_member(member):
+            return False
+        if joined:
+            self.members.append(member)
+            self._member_ids.add(int(member))
+        else:
+            self.members.remove(member)
+            self._member_ids.discard(int(member))
+        return True
+
+    async def add_member(self, member: str) -> bool:
+        if self.db.buffer is not None:
+            return self._buffer_member(member, True)
+        # Only matches when the member isn't in the group yet, so the version only moves on real changes
+        previous = self.version
+        result = await self.db.groups.find_one_and_update(
+            {"_id": self._id, "members": {"$ne": member}},
+            {"$addToSet": {"members": member}, "$inc": {"version": 1}},
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if not result:
+            return False
+        self.apply_member(member, True)
+        self.version = result["version"]
+        self._record_write(previous)
+        await self.db.memberships.update_one(
+            {"guild_id": self.guild_id, "member_id": member},
+            {"$addToSet": {"groups": self._id}},
+            upsert=True
+        )
+        self.db.dispatch_membership(self, member, True)
+        self._sync_cache()
+        return True
+
+    async def remove_member(self, member: str) -> bool:
+        if self.db.buffer is not None:
+            return self._buffer_member(member, False)
+        previous = self.version
+        result = await self.db.groups.find_one_and_update(
+            {"_id": self._id, "members": member},
+            {"$pull": {"members": member}, "$inc": {"version": 1}},
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if not result:
+            return False
+        self.apply_member(member, False)
+        self.version = result["version"]
+        self._record_write(previous)
+        await self.db.memberships.update_one(
+            {"guild_id": self.guild_id, "member_id": member},
+            {"$pull": {"groups": self._id}}
         )
+        self.db.dispatch_membership(self, member, False)
+        self._sync_cache()
+        return True
 
-    async def add_member(self, member: str):
-        self.members.append(member)
-        await self.update_fields(members=self.members)
+    def _buffer_member(self, member: str, joined: bool) -> bool:
+        # Write-behind mode: local state is authoritative and the write is batched by the buffer
+        if not self.apply_member(member, joined):
+            return False
+        self.db.buffer.queue(self, member, joined)
+        self.db.dispatch_membership(self, member, joined)
+        self._sync_cache()
+        return True
+
+    @property
+    def member_ids(self) -> List[int]:
+        return [int(member) for member in self.members]
 
-    async def remove_member(self, member: str):
-        self.members.remove(member)
-        await self.update_fields(members=self.members)
+    def has_member(self, member_id) -> bool:
+        return int(member_id) in self._member_ids
 
     def get_members(self, guild: discord.Guild):
-        members = guild.members
-        available = [member for member in members if str(member.id) in self.members]
-        return available
+        # Resolve the group's own IDs rather than filtering every member of the guild
+        members = (guild.get_member(int(member_id)) for member_id in self.members)
+        return [member for member in members if member is not None]
@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field, asdict
 from typing import Any, List, Optional
 from .groups import Group
+from ..functions.search import GroupIndex
 from ..functions.text import normalize_text
 
 
@@ -10,12 +11,18 @@ class Guild:
     _id: str
     create_roles: List[str] = field(default_factory=list)
     groups: List[Group] = field(default_factory=list)
+    _search: Optional[GroupIndex] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def search_index(self) -> GroupIndex:
+        if self._search is None:
+            self._search = GroupIndex((group.id, group.name) for group in self.groups)
+        return self._search
 
     def to_dict(self):
         return {
             "_id": self._id,
-            "create_roles": self.create_roles,
-            "groups": [group.to_dict() for group in self.groups]
+            "create_roles": self.create_roles
         }
 
     @classmethod
@@ -29,9 +36,9 @@ class Guild:
 
     @classmethod
     def from_existing(cls, db, guild_id: str, data: dict) -> "Guild":
-        groups = [Group(**group_data, guild_id=guild_id, db=db) for group_data in data.get('groups', [])]
+        groups = [Group(db=db, **{**group_data, "guild_id": guild_id}) for group_data in data.get('groups', [])]
         groups.sort(key=lambda group: group.name.lower())
-        data.pop('groups')
+        data.pop('groups', None)
         return cls(db=db, groups=groups, **data)
 
     async def update_fields(self):
@@ -40,17 +47,40 @@ class Guild:
             {"_id": self._id},
             {"$set": update_data}
         )
+        self.db.cache.set(self._id, self)
 
     async def create_group(self, creator: str, name: str, description: str) -> Group:
-        existing = [normalize_text(group.name) for group in self.groups]
+        existing = [group.normalized_name for group in self.groups]
         if normalize_text(name) in existing:
             raise ValueError("Group with that name already exists!")
-        group = Group.create(self.db, creator, name, description)
+        group = Group.create(self.db, creator, name, description, guild_id=self._id)
+        await group.save()
         self.groups.append(group)
-        await self.update_fields()
+        self.groups.sort(key=lambda group: group.name.lower())
+        if self._search is not None:
+            self._search.add(group.id, group.name)
+        self.db.cache.set(self._id, self, keep_age=True)
         return group
 
     async def delete_group(self, group_id: str):
-        group_to_delete = next((group for group in self.groups if group._id == group_id), None)
-        self.groups.remove(group_to_delete)
-        await self.update_fields()
+        await self.db.groups.delete_one({"_id": group_id, "guild_id": self._id})
+        await self.db.memberships.update_many(
+            {"guild_id": self._id, "groups": group_id},
+            {"$pull": {"groups": group_id}}
+        )
+        self.groups = [group for group in self.groups if group._id != group_id]
+        if self._search is not None:
+            self._search.remove(group_id)
+        self.db.cache.set(self._id, self, keep_age=True)
+
+    def put_group(self, group: Group):
+        # Swaps in a newer copy of a group, e.g. one written by another process
+        for index, existing in enumerate(self.groups):
+            if existing.id == group.id:
+                self.groups[index] = group
+                break
+        else:
+            self.groups.append(group)
+        self.groups.sort(key=lambda group: group.name.lower())
+        if self._search is not None:
+            self._search.add(group.id, group.name)
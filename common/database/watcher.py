@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from typing import Any, Optional
+
+import pymongo.errors
+
+from common.database.groups import Group
+from common.functions.cache import LRUCache
+
+# Error codes for deployments without an oplog, e.g. a standalone mongod
+UNSUPPORTED_CODES = {40573, 40324}
+
+
+class ChangeWatcher:
+    def __init__(self, db: Any, retry_delay: float = 5):
+        self.db = db
+        self.retry_delay = retry_delay
+        self.log = logging.getLogger("database")
+        self.active = False
+        self._resume_token: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+        # (group_id, version) pairs written by this process, whose events don't need to invalidate anything
+        self._written = LRUCache(maxsize=4096, ttl=600)
+
+    def record(self, group_id: str, version: int):
+        self._written.set((group_id, version), True)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.active = False
+
+    async def _run(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": ["guilds", "groups"]}}}]
+        while True:
+            try:
+                async with self.db.database.watch(
+                        pipeline, full_document="updateLookup", resume_after=self._resume_token
+                ) as stream:
+                    if not self.active:
+                        self.log.info("Watching guilds and groups for changes from other processes")
+                    self.active = True
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        self._handle(change)
+            except pymongo.errors.OperationFailure as e:
+                self.active = False
+                if e.code in UNSUPPORTED_CODES or "replica set" in str(e):
+                    ttl = self.db.cache.ttl
+                    self.log.warning(
+                        f"Change streams are unavailable, cached guilds expire after "
+                        f"{f'{ttl:.0f}s' if ttl else 'never'} instead: {e}"
+                    )
+                    return
+                # The resume token fell off the oplog, so changes may have been missed
+                self.log.error(f"Lost the change stream, clearing the cache: {e}")
+                self._resume_token = None
+                self.db.cache.clear()
+            except pymongo.errors.PyMongoError as e:
+                self.active = False
+                self.log.error(f"Change stream interrupted, retrying in {self.retry_delay}s: {e}")
+            await asyncio.sleep(self.retry_delay)
+
+    def _handle(self, change: dict):
+        operation = change["operationType"]
+        if operation in ("drop", "rename", "dropDatabase", "invalidate"):
+            return self.db.cache.clear()
+        document_id = change["documentKey"]["_id"]
+        document = change.get("fullDocument")
+        if change["ns"]["coll"] == "guilds":
+            guild = self.db.cache.peek(document_id)
+            if guild is not None and (document is None or document.get("create_roles") != guild.create_roles):
+                self.db.cache.invalidate(document_id)
+            return
+        if document is None:
+            # Deletes only carry the group ID, so look for whichever cached guild still has it
+            for guild in self.db.cache.values():
+                if any(group.id == document_id for group in guild.groups):
+                    self.db.cache.invalidate(guild._id)
+            return
+        # The looked up document may already include later writes, the update itself has the exact version
+        updated = (change.get("updateDescription") or {}).get("updatedFields") or {}
+        version = updated.get("version", document.get("version", 0))
+        if (document_id, version) in self._written:
+            return
+        guild = self.db.cache.peek(document["guild_id"])
+        if guild is None:
+            return
+        current = next((group for group in guild.groups if group.id == document_id), None)
+        if current is not None and current.version >= document.get("version", 0):
+            return
+        # The looked up document is the group's latest state, so only that group is replaced
+        guild.put_group(self.db._overlay(Group(db=self.db, **document)))
@@ -0,0 +1,69 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: Hashable):
+        return self.peek(key) is not None
+
+    def _expired(self, stored_at: float):
+        return self.ttl is not None and time.monotonic() - stored_at > self.ttl
+
+    def get(self, key: Hashable, default: Any = None):
+        item = self._data.get(key)
+        if item is None or self._expired(item[1]):
+            if item is not None:
+                del self._data[key]
+                self.evictions += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def peek(self, key: Hashable, default: Any = None):
+        item = self._data.get(key)
+        if item is None or self._expired(item[1]):
+            return default
+        return item[0]
+
+    def set(self, key: Hashable, value: Any, keep_age: bool = False):
+        # keep_age stores an updated value without extending how long an existing entry lives
+        item = self._data.get(key)
+        stored_at = item[1] if keep_age and item is not None else time.monotonic()
+        self._data[key] = (value, stored_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        return self._data.pop(key, (None,))[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def values(self):
+        return [value for value, stored_at in self._data.values() if not self._expired(stored_at)]
+
+    @property
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import Connection, wait
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+
+HEARTBEAT_INTERVAL = 15
+HEARTBEAT_TIMEOUT = 60
+# Logging in and loading extensions happens before the first heartbeat can be sent
+STARTUP_GRACE = 180
+# A cluster that keeps crashing on startup is restarted at most this often
+RESTART_DELAY = 10
+
+log = logging.getLogger("cluster")
+
+
+async def recommended_shards(token: str) -> int:
+    headers = {"Authorization": f"Bot {token}"}
+    async with aiohttp.ClientSession(headers=headers) as session:
+        async with session.get("https://discord.com/api/v10/gateway/bot") as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+
+def shard_ranges(shard_count: int, clusters: int) -> List[List[int]]:
+    size = math.ceil(shard_count / clusters)
+    return [list(range(start, min(start + size, shard_count))) for start in range(0, shard_count, size)]
+
+
+class Cluster:
+    def __init__(self, cluster_id: int, shard_ids: List[int], shard_count: int, target: Callable):
+        self.id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.target = target
+        self.process: Optional[multiprocessing.Process] = None
+        self.conn: Optional[Connection] = None
+        self.started_at = 0.0
+        self.last_seen = 0.0
+        self.ready = False
+        self.stats: dict = {}
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    @property
+    def stale(self) -> bool:
+        since = self.last_seen or self.started_at + STARTUP_GRACE - HEARTBEAT_TIMEOUT
+        return time.monotonic() - since > HEARTBEAT_TIMEOUT
+
+    def start(self):
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=self.target, args=(self.id, self.shard_ids, self.shard_count, child), name=f"cluster-{self.id}"
+        )
+        self.process.start()
+        child.close()
+        self.started_at = time.monotonic()
+        self.last_seen = 0.0
+        self.ready = False
+        self.stats = {}
+        log.info(f"Started cluster {self.id} (pid {self.process.pid}) with shards {self.shard_ids}")
+
+    def send(self, message: dict):
+        if self.conn is None:
+            return
+        try:
+            self.conn.send(message)
+        except (OSError, ValueError):
+            pass
+
+    def stop(self, timeout: float = 30):
+        if self.alive:
+            self.send({"op": "shutdown"})
+            self.process.join(timeout)
+            if self.process.is_alive():
+                log.warning(f"Cluster {self.id} didn't shut down in {timeout}s, terminating it")
+                self.process.terminate()
+                self.process.join(5)
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+
+class ClusterManager:
+    def __init__(self, target: Callable, shard_count: int, clusters: int):
+        self.clusters = [
+            Cluster(cluster_id, shard_ids, shard_count, target)
+            for cluster_id, shard_ids in enumerate(shard_ranges(shard_count, clusters))
+        ]
+        self.stopping = False
+        # Clusters waiting for a rolling restart, only one of them is down at a time
+        self._rolling: List[Cluster] = []
+        self._restarting: Optional[Cluster] = None
+        self._broadcast_at = 0.0
+
+    def _on_stop(self, signum, frame):
+        self.stopping = True
+
+    def _on_rolling_restart(self, signum, frame):
+        self.rolling_restart()
+
+    def rolling_restart(self):
+        if self._rolling or self._restarting:
+            return log.warning("A rolling restart is already in progress")
+        log.info("Starting a rolling restart")
+        self._rolling = list(self.clusters)
+
+    def run(self):
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._on_rolling_restart)
+        for cluster in self.clusters:
+            cluster.start()
+        try:
+            while not self.stopping:
+                self._poll()
+                self._check_health()
+                self._step_rolling()
+                self._broadcast()
+        finally:
+            log.info("Shutting down all clusters...")
+            for cluster in self.clusters:
+                cluster.stop()
+
+    def _poll(self):
+        conns: Dict[Connection, Cluster] = {cluster.conn: cluster for cluster in self.clusters if cluster.conn}
+        for conn in wait(list(conns), timeout=1):
+            cluster = conns[conn]
+            try:
+                while conn.poll():
+                    self._handle(cluster, conn.recv())
+            except (EOFError, OSError):
+                # The worker went away, a pipe at EOF stays readable so stop waiting on it until the restart
+                conn.close()
+                cluster.conn = None
+
+    def _handle(self, cluster: Cluster, message: dict):
+        cluster.last_seen = time.monotonic()
+        if message["op"] == "ready" and not cluster.ready:
+            cluster.ready = True
+            log.info(f"Cluster {cluster.id} is ready")
+        elif message["op"] == "heartbeat":
+            cluster.stats = message["stats"]
+        elif message["op"] == "restart":
+            self.rolling_restart()
+
+    def _check_health(self):
+        for cluster in self.clusters:
+            if self.stopping or time.monotonic() - cluster.started_at < RESTART_DELAY:
+                continue
+            if not cluster.alive:
+                log.error(f"Cluster {cluster.id} exited with code {cluster.process.exitcode}, restarting it")
+            elif cluster.stale:
+                log.error(f"Cluster {cluster.id} missed its heartbeats, restarting it")
+            else:
+                continue
+            cluster.restart()
+
+    def _step_rolling(self):
+        if self._restarting is not None:
+            if not self._restarting.ready:
+                return
+            self._restarting = None
+        if self._rolling:
+            cluster = self._rolling.pop(0)
+            log.info(f"Rolling restart of cluster {cluster.id}")
+            cluster.restart()
+            self._restarting = cluster
+
+    def _broadcast(self):
+        now = time.monotonic()
+        if now - self._broadcast_at < HEARTBEAT_INTERVAL:
+            return
+        self._broadcast_at = now
+        stats = {cluster.id: {**cluster.stats, "ready": cluster.ready} for cluster in self.clusters}
+        for cluster in self.clusters:
+            cluster.send({"op": "stats", "clusters": stats})
+
+
+class ClusterClient:
+    def __init__(self, bot, cluster_id: int, conn: Connection):
+        self.bot = bot
+        self.id = cluster_id
+        self.conn = conn
+        self.started_at = time.monotonic()
+        # The latest stats of every cluster, as broadcast by the manager
+        self.clusters: Dict[int, dict] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._ready())]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def send(self, message: dict):
+        try:
+            self.conn.send(message)
+        except (OSError, ValueError):
+            self.bot.log.error("Lost the connection to the cluster manager")
+
+    def request_restart(self):
+        self.send({"op": "restart"})
+
+    def stats(self) -> dict:
+        return {
+            "shards": list(self.bot.shards),
+            "guilds": len(self.bot.guilds),
+            "latency": self.bot.latency,
+            "uptime": time.monotonic() - self.started_at,
+        }
+
+    async def _ready(self):
+        await self.bot.wait_until_ready()
+        self.send({"op": "ready"})
+
+    async def _run(self):
+        last_beat = 0.0
+        while True:
+            if time.monotonic() - last_beat >= HEARTBEAT_INTERVAL:
+                self.send({"op": "heartbeat", "stats": self.stats()})
+                last_beat = time.monotonic()
+            try:
+                messages = [self.conn.recv() for _ in iter(self.conn.poll, False)]
+            except EOFError:
+                # The manager is gone, nothing would restart this cluster if it died now
+                messages = [{"op": "shutdown"}]
+            for message in messages:
+                if message["op"] == "shutdown":
+                    self.bot.log.info("Shutdown requested by the cluster manager")
+                    asyncio.create_task(self.bot.close())
+                    return
+                elif message["op"] == "stats":
+                    self.clusters = message["clusters"]
+            await asyncio.sleep(1)
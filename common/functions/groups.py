@@ -1,23 +1,97 @@
+import copy
+from typing import Optional
+
 import discord
 
 from common.components.buttons.groupjoin import GroupJoin
 from common.components.buttons.groupleave import GroupLeave
+from common.components.buttons.grouplist import GroupListPage
 from common.components.buttons.groupmembers import GroupMembers
+from common.components.buttons.groupopen import GroupOpen
 from common.components.buttons.grouprefresh import GroupRefresh
 from common.database import Group
+from common.functions.cache import LRUCache
+from common.functions.paginator import format_group_entries
+
+# Part of the render cache key, bump it when the group embed layout changes
+EMBED_TEMPLATE_VERSION = 1
+DEFAULT_STALENESS = 30
+
+# Rendered group embeds keyed by (group id, group version, member count, template version, icon). The member count
+# covers buffered joins and leaves, which only bump the version once they're flushed
+_rendered = LRUCache(maxsize=4096)
+
+
+def _guild_icon(guild: discord.Guild) -> Optional[str]:
+    return guild.icon.with_static_format("png").with_size(512).url if guild.icon else None
+
+
+def group_embed(interaction: discord.Interaction, **fields) -> discord.Embed:
+    em = discord.Embed.from_dict({"type": "rich", "color": interaction.client.config.colors["main"].value, **fields})
+    if icon_url := _guild_icon(interaction.guild):
+        em.set_thumbnail(url=icon_url)
+    return em
+
 
+def render_group(interaction: discord.Interaction, group: Group) -> discord.Embed:
+    key = (group.id, group.version, len(group.members), EMBED_TEMPLATE_VERSION, _guild_icon(interaction.guild))
+    data = _rendered.get(key)
+    if data is None:
+        # Without a chunked member cache, counting present members would mean fetching all of them
+        count = len(group.get_members(interaction.guild)) if interaction.guild.chunked else len(group.members)
+        em = group_embed(interaction, title=group.name, description=group.description)
+        em.add_field(name="Members:", value=f"{count}")
+        em.add_field(name="Creator:", value=f"<@{group.creator}>")
+        data = em.to_dict()
+        _rendered.set(key, data)
+    return discord.Embed.from_dict(copy.deepcopy(data))
 
-async def build_group_info(interaction: discord.Interaction, group: Group):
-    group = await interaction.client.db.get_group(str(interaction.guild.id), group.id)
-    members = group.get_members(interaction.guild)
-    em = discord.Embed(color=interaction.client.config.colors["main"], title=group.name,
-                       description=group.description)
-    em.set_thumbnail(url=interaction.guild.icon.with_static_format("png").with_size(512).url)
-    em.add_field(name="Members:", value=f"{len(members)}")
-    em.add_field(name="Creator:", value=f"<@{group.creator}>")
+
+async def build_group_info(interaction: discord.Interaction, group: Group, max_age: Optional[float] = None):
+    # The caller's snapshot is used as-is unless it's older than the allowed staleness
+    if max_age is None:
+        max_age = getattr(interaction.client.config, "group_staleness", DEFAULT_STALENESS)
+    if group.age > max_age:
+        group = await interaction.client.db.get_group(str(interaction.guild.id), group.id, refresh=True) or group
+    em = render_group(interaction, group)
     view = discord.ui.View(timeout=None)
-    view.add_item(GroupRefresh(interaction.client.db, group.id))
+    emojis = interaction.client.resolve_emojis("buttons.refresh", "buttons.members")
+    view.add_item(GroupRefresh(interaction.client.db, group.id, emoji=emojis["buttons.refresh"]))
     view.add_item(GroupJoin(interaction.client.db, group.id))
     view.add_item(GroupLeave(interaction.client.db, group.id))
-    view.add_item(GroupMembers(interaction.client.db, group.id))
+    view.add_item(GroupMembers(interaction.client.db, group.id, emoji=emojis["buttons.members"]))
+    return em, view
+
+
+async def build_group_list(interaction: discord.Interaction, page: int, sort: str = "name", user_id: int = None,
+                           per_page: int = 5):
+    db = interaction.client.db
+    user_id = user_id or interaction.user.id
+    groups, total = await db.get_group_page(str(interaction.guild_id), page, per_page, sort)
+    max_pages = max(1, -(-total // per_page))
+    if page >= max_pages and total:
+        page = max_pages - 1
+        groups, total = await db.get_group_page(str(interaction.guild_id), page, per_page, sort)
+
+    em = group_embed(interaction, title="Groups")
+    em.description = format_group_entries(groups, page * per_page) or "No groups"
+    if max_pages > 1:
+        em.set_footer(text=f'Page {page + 1}/{max_pages} ({total} groups)')
+
+    view = discord.ui.View(timeout=None)
+    if max_pages > 1:
+        buttons = [
+            ("first", 0, "≪", page == 0, discord.ButtonStyle.grey),
+            ("back", page - 1, str(page) if page else "…", page == 0, discord.ButtonStyle.blurple),
+            ("current", page, str(page + 1), True, discord.ButtonStyle.grey),
+            ("next", page + 1, str(page + 2) if page + 1 < max_pages else "…", page + 1 >= max_pages,
+             discord.ButtonStyle.blurple),
+            ("last", max_pages - 1, "≫", page + 1 >= max_pages, discord.ButtonStyle.grey),
+        ]
+        for slot, target, label, disabled, style in buttons:
+            view.add_item(GroupListPage(db, user_id, max(target, 0), sort, slot, label, disabled=disabled, style=style))
+    for index, entry in enumerate(groups, start=page * per_page):
+        button = GroupOpen(db, entry["_id"], label=str(index + 1))
+        button.item.row = 1
+        view.add_item(button)
     return em, view
@@ -0,0 +1,29 @@
+import json
+import logging
+from logging.handlers import QueueHandler
+
+# Extra fields passed through `extra=` that are copied into JSON log lines when present
+EXTRA_FIELDS = ("interaction_id", "guild", "command", "latency")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "location": f"{record.filename}:{record.lineno}",
+        }
+        for field in EXTRA_FIELDS:
+            if hasattr(record, field):
+                data[field] = getattr(record, field)
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    # The queue never leaves the process, so formatting is left to the listener thread
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
@@ -0,0 +1,35 @@
+from typing import Dict, Iterable, List, Optional
+
+import discord
+
+from .cache import LRUCache
+
+# The gateway accepts at most 100 user IDs per member request
+QUERY_LIMIT = 100
+
+
+class MemberResolver:
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = 600):
+        # Members fetched on demand when the guild isn't chunked, keyed by (guild_id, member_id)
+        self.cache = LRUCache(maxsize, ttl)
+
+    def get(self, guild: discord.Guild, member_id: int) -> Optional[discord.Member]:
+        return guild.get_member(member_id) or self.cache.get((guild.id, member_id))
+
+    async def resolve(self, guild: discord.Guild, member_ids: Iterable[int]) -> List[discord.Member]:
+        member_ids = list(member_ids)
+        found: Dict[int, discord.Member] = {}
+        missing = []
+        for member_id in member_ids:
+            if member := self.get(guild, member_id):
+                found[member_id] = member
+            else:
+                missing.append(member_id)
+        # A chunked guild already has everyone cached, so anything missing has left
+        if missing and not guild.chunked:
+            for start in range(0, len(missing), QUERY_LIMIT):
+                chunk = missing[start:start + QUERY_LIMIT]
+                for member in await guild.query_members(user_ids=chunk, limit=len(chunk), cache=False):
+                    self.cache.set((guild.id, member.id), member)
+                    found[member.id] = member
+        return [found[member_id] for member_id in member_ids if member_id in found]
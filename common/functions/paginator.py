@@ -6,6 +6,28 @@ import discord
 from discord.ext import menus
 
 from common.database import Group
+from common.functions.cache import LRUCache
+from common.functions.members import MemberResolver
+
+# Rendered group list pages, keyed by each entry's (id, version) so any change to a group misses
+_group_pages = LRUCache(maxsize=1024)
+
+
+def format_group_entries(entries: List[dict], start: int) -> str:
+    key = (start, tuple((entry["_id"], entry.get("version", 0), entry["member_count"]) for entry in entries))
+    text = _group_pages.get(key)
+    if text is None:
+        pages = []
+        for index, entry in enumerate(entries, start=start):
+            pages.append(
+                f'## {index + 1}. {entry["name"]}\n'
+                f'{entry["description"]}\n'
+                f'**Members:** {entry["member_count"]}\n'
+                f'**Creator:** <@{entry["creator"]}>'
+            )
+        text = '\n'.join(pages)
+        _group_pages.set(key, text)
+    return text
 
 
 class NumberedPageModal(discord.ui.Modal, title='Go to page'):
@@ -216,6 +238,7 @@ class GroupPages(discord.ui.View):
         self.interaction: discord.Interaction = interaction
         self.message: Optional[discord.Message] = None
         self.current_page: int = 0
+        self.current_entries: List[Group] = []
         self.clear_items()
         self.fill_items()
 
@@ -261,6 +284,7 @@ class GroupPages(discord.ui.View):
     async def show_page(self, interaction: discord.Interaction, page_number: int) -> None:
         page = await self.source.get_page(page_number)
         self.current_page = page_number
+        self.current_entries = page
         kwargs = await self._get_kwargs_from_page(page)
         await self._update_labels(page_number)
         if kwargs:
@@ -343,6 +367,7 @@ class GroupPages(discord.ui.View):
     async def start(self, *, content: Optional[str] = None, ephemeral: bool = False) -> None:
         await self.source._prepare_once()
         page = await self.source.get_page(0)
+        self.current_entries = page
         kwargs = await self._get_kwargs_from_page(page)
         if content:
             kwargs.setdefault('content', content)
@@ -375,45 +400,32 @@ class GroupPages(discord.ui.View):
         # The call here is safe because it's guarded by skip_if
         await self.show_page(interaction, self.source.get_max_pages() - 1)  # type: ignore
 
-    @discord.ui.button(label="1", style=discord.ButtonStyle.grey, custom_id="group_option_one")
-    async def group_option_one(self, interaction: discord.Interaction, _button: discord.ui.Button):
+    async def _show_group(self, interaction: discord.Interaction, index: int):
+        # noinspection PyUnresolvedReferences
         await interaction.response.defer()
         from common.functions.groups import build_group_info
-        group_data = (await self.source.get_page(self.current_page))[0]
-        em, view = await build_group_info(self.interaction, group_data)
+        em, view = await build_group_info(self.interaction, self.current_entries[index])
         await interaction.followup.send(embed=em, view=view, ephemeral=True)
 
+    @discord.ui.button(label="1", style=discord.ButtonStyle.grey, custom_id="group_option_one")
+    async def group_option_one(self, interaction: discord.Interaction, _button: discord.ui.Button):
+        await self._show_group(interaction, 0)
+
     @discord.ui.button(label="2", style=discord.ButtonStyle.grey, custom_id="group_option_two")
     async def group_option_two(self, interaction: discord.Interaction, _button: discord.ui.Button):
-        await interaction.response.defer()
-        from common.functions.groups import build_group_info
-        group_data = (await self.source.get_page(self.current_page))[1]
-        em, view = await build_group_info(self.interaction, group_data)
-        await interaction.followup.send(embed=em, view=view, ephemeral=True)
+        await self._show_group(interaction, 1)
 
     @discord.ui.button(label="3", style=discord.ButtonStyle.grey, custom_id="group_option_three")
     async def group_option_three(self, interaction: discord.Interaction, _button: discord.ui.Button):
-        await interaction.response.defer()
-        from common.functions.groups import build_group_info
-        group_data = (await self.source.get_page(self.current_page))[2]
-        em, view = await build_group_info(self.interaction, group_data)
-        await interaction.followup.send(embed=em, view=view, ephemeral=True)
+        await self._show_group(interaction, 2)
 
     @discord.ui.button(label="4", style=discord.ButtonStyle.grey, custom_id="group_option_four")
     async def group_option_four(self, interaction: discord.Interaction, _button: discord.ui.Button):
-        await interaction.response.defer()
-        from common.functions.groups import build_group_info
-        group_data = (await self.source.get_page(self.current_page))[3]
-        em, view = await build_group_info(self.interaction, group_data)
-        await interaction.followup.send(embed=em, view=view, ephemeral=True)
+        await self._show_group(interaction, 3)
 
     @discord.ui.button(label="5", style=discord.ButtonStyle.grey, custom_id="group_option_five")
     async def group_option_five(self, interaction: discord.Interaction, _button: discord.ui.Button):
-        await interaction.response.defer()
-        from common.functions.groups import build_group_info
-        group_data = (await self.source.get_page(self.current_page))[4]
-        em, view = await build_group_info(self.interaction, group_data)
-        await interaction.followup.send(embed=em, view=view, ephemeral=True)
+        await self._show_group(interaction, 4)
 
     @discord.ui.button(label='Skip to page...', style=discord.ButtonStyle.grey)
     async def numbered_page(self, interaction: discord.Interaction, _button: discord.ui.Button):
@@ -464,21 +476,15 @@ class GroupsPageSource(menus.ListPageSource):
 
     # noinspection PyUnresolvedReferences
     async def format_page(self, menu, entries: List[Group]):
-        pages = []
-        for index, entry in enumerate(entries, start=menu.current_page * self.per_page):
-            pages.append(
-                f'## {index + 1}. {entry.name}\n'
-                f'{entry.description}\n'
-                f'**Members:** {len(entry.members)}\n'
-                f'**Creator:** <@{entry.creator}>'
-            )
+        summaries = [{**entry.to_dict(), "member_count": len(entry.members)} for entry in entries]
+        description = format_group_entries(summaries, menu.current_page * self.per_page)
 
         maximum = self.get_max_pages()
         if maximum > 1:
             footer = f'Page {menu.current_page + 1}/{maximum} ({len(self.entries)} groups)'
             menu.embed.set_footer(text=footer)
 
-        menu.embed.description = '\n'.join(pages)
+        menu.embed.description = description
         return menu.embed
 
 
@@ -497,6 +503,52 @@ class IndexedPageSource(menus.ListPageSource):
         return menu.embed
 
 
+class GroupMembersPageSource(menus.PageSource):
+    # Only the requested page's member IDs are loaded and formatted
+    def __init__(self, db, guild: discord.Guild, group_id: str, total: int, first_page: List[str],
+                 per_page: int = 12, resolver: Optional[MemberResolver] = None):
+        self.db = db
+        self.resolver = resolver
+        self.guild = guild
+        self.group_id = group_id
+        self.total = total
+        self.per_page = per_page
+        self._first_page = first_page
+
+    def is_paginating(self) -> bool:
+        return self.total > self.per_page
+
+    def get_max_pages(self) -> int:
+        return max(1, -(-self.total // self.per_page))
+
+    async def get_page(self, page_number: int) -> List[str]:
+        if page_number == 0 and self._first_page is not None:
+            entries, self._first_page = self._first_page, None
+            return entries
+        entries, self.total = await self.db.get_group_members_page(
+            str(self.guild.id), self.group_id, page_number * self.per_page, self.per_page
+        )
+        return entries
+
+    async def format_page(self, menu, entries: List[str]):
+        if self.resolver:
+            resolved = {member.id: member for member in await self.resolver.resolve(self.guild, map(int, entries))}
+        else:
+            resolved = {}
+        pages = []
+        for index, member_id in enumerate(entries, start=menu.current_page * self.per_page):
+            member = resolved.get(int(member_id)) or self.guild.get_member(int(member_id))
+            pages.append(f'{index + 1}. <@{member_id}>' + (f' `[{member}]`' if member else ''))
+
+        maximum = self.get_max_pages()
+        if maximum > 1:
+            footer = f'Page {menu.current_page + 1}/{maximum} ({self.total} entries)'
+            menu.embed.set_footer(text=footer)
+
+        menu.embed.description = '\n'.join(pages)
+        return menu.embed
+
+
 class IndexedGroupPages(GroupPages):
     def __init__(self, entries, *, interaction: discord.Interaction, embed: discord.Embed = None):
         super().__init__(GroupsPageSource(entries, per_page=5), interaction=interaction)
@@ -507,3 +559,12 @@ class IndexedPagesInteraction(InteractionPages):
     def __init__(self, entries, *, interaction: discord.Interaction, embed: discord.Embed = None, per_page: int = 12):
         super().__init__(IndexedPageSource(entries, per_page=per_page), interaction=interaction)
         self.embed = embed or discord.Embed(color=discord.Color.blurple())
+
+
+class GroupMembersPages(InteractionPages):
+    def __init__(self, group_id: str, total: int, first_page: List[str], *, interaction: discord.Interaction,
+                 embed: discord.Embed = None, per_page: int = 12):
+        source = GroupMembersPageSource(interaction.client.db, interaction.guild, group_id, total, first_page,
+                                        per_page=per_page, resolver=interaction.client.member_cache)
+        super().__init__(source, interaction=interaction)
+        self.embed = embed or discord.Embed(color=discord.Color.blurple())
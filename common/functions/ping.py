@@ -0,0 +1,123 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+import discord
+
+MESSAGE_LIMIT = 2000
+
+
+def pack_mentions(header: str, mentions: List[str], delim: str = ", ", limit: int = MESSAGE_LIMIT) -> List[str]:
+    # Greedily fills every message up to the limit, which is optimal for an ordered list of mentions
+    pages = []
+    current = header
+    for mention in mentions:
+        separator = delim if current != header else ""
+        if current and len(current) + len(separator) + len(mention) > limit:
+            pages.append(current)
+            current, separator = "", ""
+        current += separator + mention
+    if current and current != header:
+        pages.append(current)
+    return pages
+
+
+class PingJob:
+    def __init__(
+            self,
+            channel: discord.abc.Messageable,
+            pages: List[str],
+            *,
+            allowed_mentions: Optional[discord.AllowedMentions] = None,
+            progress: Optional[Callable[["PingJob"], Awaitable]] = None,
+            report_every: int = 5
+    ):
+        self.channel = channel
+        self.pages = pages
+        self.allowed_mentions = allowed_mentions or discord.AllowedMentions(users=True, everyone=False, roles=False)
+        self.progress = progress
+        self.report_every = report_every
+        self.sent = 0
+        self.error: Optional[discord.HTTPException] = None
+        self.cancelled = False
+        self.finished = asyncio.Event()
+
+    @property
+    def total(self):
+        return len(self.pages)
+
+    def cancel(self):
+        self.cancelled = True
+
+    async def report(self):
+        # Progress is best-effort, e.g. the interaction token may expire while the job waits in the queue
+        try:
+            await self.progress(self)
+        except discord.HTTPException:
+            pass
+
+    async def run(self):
+        try:
+            for page in self.pages:
+                if self.cancelled:
+                    break
+                # discord.py waits out the channel's rate limit bucket before each send
+                await self.channel.send(page, allowed_mentions=self.allowed_mentions)
+                self.sent += 1
+                if self.progress and self.sent % self.report_every == 0 and self.sent < self.total:
+                    await self.report()
+        finally:
+            self.finished.set()
+
+
+class PingDispatcher:
+    def __init__(self):
+        self._pending: Dict[int, Deque[PingJob]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, job: PingJob) -> PingJob:
+        # Jobs for the same channel share its rate limit bucket, so they run one after another
+        # while jobs for different channels run in parallel
+        channel_id = job.channel.id
+        if channel_id in self._pending:
+            self._pending[channel_id].append(job)
+        else:
+            self._pending[channel_id] = deque([job])
+            task = asyncio.create_task(self._drain(channel_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _drain(self, channel_id: int):
+        pending = self._pending[channel_id]
+        try:
+            while pending:
+                job = pending[0]
+                try:
+                    await job.run()
+                except discord.HTTPException as e:
+                    job.error = e
+                pending.popleft()
+        finally:
+            for job in pending:
+                job.cancel()
+                job.finished.set()
+            del self._pending[channel_id]
+
+    def cancel_all(self):
+        for pending in self._pending.values():
+            for job in pending:
+                job.cancel()
+
+
+class PingCancelView(discord.ui.View):
+    def __init__(self, job: PingJob):
+        super().__init__(timeout=None)
+        self.job = job
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.red)
+    async def cancel(self, interaction: discord.Interaction, _button: discord.ui.Button):
+        self.job.cancel()
+        # noinspection PyUnresolvedReferences
+        await interaction.response.defer()
+        self.stop()
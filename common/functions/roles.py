@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+import discord
+
+from common.database import Group
+
+
+class RoleSync:
+    def __init__(self, bot: discord.Client, delay: float = 2.0):
+        self.bot = bot
+        self.delay = delay
+        self.log = logging.getLogger("roles")
+        # (guild_id, member_id) -> {role_id: should_have_role}, so repeated clicks collapse to the last state
+        self._pending: Dict[Tuple[int, int], Dict[int, bool]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def queue(self, group: Group, member: str, joined: bool):
+        if not group.role_id:
+            return
+        self._pending.setdefault((int(group.guild_id), int(member)), {})[int(group.role_id)] = joined
+        self._wakeup.set()
+
+    def queue_group(self, group: Group):
+        for member in group.members:
+            self.queue(group, member, True)
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Give bursts of joins a moment to coalesce before touching the API
+            await asyncio.sleep(self.delay)
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        batch, self._pending = self._pending, {}
+        for (guild_id, member_id), roles in batch.items():
+            try:
+                await self._apply(guild_id, member_id, roles)
+            except discord.HTTPException as e:
+                self.log.error(f"Failed to sync roles for {member_id} in {guild_id}: {e}")
+            except Exception as e:
+                self.log.exception(f"Unexpected error syncing roles for {member_id} in {guild_id}: {e}")
+
+    async def _apply(self, guild_id: int, member_id: int, roles: Dict[int, bool]):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        member = guild.get_member(member_id)
+        if member is None:
+            try:
+                member = await guild.fetch_member(member_id)
+            except discord.NotFound:
+                return
+        current = {role.id for role in member.roles[1:]}
+        # Only the changed roles are touched, so role changes made elsewhere since the member was cached survive
+        added = {role_id for role_id, joined in roles.items() if joined and guild.get_role(role_id)} - current
+        removed = {role_id for role_id, joined in roles.items() if not joined} & current
+        if added:
+            await member.add_roles(*(discord.Object(id=role_id) for role_id in added), reason="Group role sync")
+        if removed:
+            await member.remove_roles(*(discord.Object(id=role_id) for role_id in removed), reason="Group role sync")
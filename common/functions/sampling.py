@@ -0,0 +1,78 @@
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from .cache import LRUCache
+
+# Transactions for button callbacks fire on every click and are sampled at the lower "hot" rate
+HOT_PREFIXES = ("groups:join", "groups:leave", "groups:refresh", "groups:members", "groups:list", "groups:open")
+
+DEFAULTS = {
+    "traces": 0.1,
+    "profiles": 0.1,
+    "hot": 0.01,
+    "slow_ms": 2000,
+    "target_per_minute": 60,
+}
+
+
+def sampling_config(config) -> dict:
+    # config.sentry_sampling overrides the defaults, SENTRY_<KEY> environment variables override both
+    options = {**DEFAULTS, **getattr(config, "sentry_sampling", {})}
+    for key, default in DEFAULTS.items():
+        if value := os.getenv(f"SENTRY_{key.upper()}"):
+            options[key] = type(default)(float(value))
+    return options
+
+
+class TraceSampler:
+    def __init__(self, traces: float, hot: float, slow_ms: float, target_per_minute: float, window: float = 60):
+        self.traces = traces
+        self.hot = hot
+        self.slow_ms = slow_ms
+        self.target_per_minute = target_per_minute
+        self.window = window
+        self._seen: Counter = Counter()
+        self._throughput: Counter = Counter()
+        self._window_start = time.monotonic()
+        # Transactions that were recently slow or errored are always sampled for a while
+        self._flagged = LRUCache(maxsize=512, ttl=600)
+
+    @classmethod
+    def from_config(cls, options: dict) -> "TraceSampler":
+        return cls(options["traces"], options["hot"], options["slow_ms"], options["target_per_minute"])
+
+    def _tick(self, name: str):
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            scale = 60 / max(now - self._window_start, 1)
+            self._throughput = Counter({key: count * scale for key, count in self._seen.items()})
+            self._seen = Counter()
+            self._window_start = now
+        self._seen[name] += 1
+
+    def __call__(self, sampling_context: dict) -> float:
+        if sampling_context.get("parent_sampled") is not None:
+            return float(sampling_context["parent_sampled"])
+        name = (sampling_context.get("transaction_context") or {}).get("name") or ""
+        self._tick(name)
+        if name in self._flagged:
+            return 1.0
+        rate = self.hot if name.startswith(HOT_PREFIXES) else self.traces
+        # Keep roughly target_per_minute traces per transaction name no matter how busy it gets
+        if throughput := self._throughput.get(name):
+            rate = min(rate, self.target_per_minute / throughput)
+        return rate
+
+    def flag(self, name: Optional[str]):
+        if name:
+            self._flagged.set(name, True)
+
+    def before_send_transaction(self, event: dict, _hint: dict) -> dict:
+        start, end = event.get("start_timestamp"), event.get("timestamp")
+        if isinstance(start, datetime) and isinstance(end, datetime):
+            if (end - start).total_seconds() * 1000 >= self.slow_ms:
+                self.flag(event.get("transaction"))
+        return event
@@ -0,0 +1,71 @@
+import heapq
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .text import normalize_text
+
+GRAM_SIZE = 3
+
+
+def _grams(text: str):
+    # Every 1-3 character slice, so short queries are a direct lookup and longer ones intersect trigrams
+    return {text[start:start + size] for size in range(1, GRAM_SIZE + 1) for start in range(len(text) - size + 1)}
+
+
+class GroupIndex:
+    def __init__(self, groups: Iterable[Tuple[str, str]] = ()):
+        self._names: Dict[str, Tuple[str, str]] = {}
+        self._grams: Dict[str, Set[str]] = defaultdict(set)
+        for group_id, name in groups:
+            self.add(group_id, name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, group_id: str, name: str):
+        if group_id in self._names:
+            if self._names[group_id][1] == name:
+                return
+            self.remove(group_id)
+        normalized = normalize_text(name)
+        self._names[group_id] = (normalized, name)
+        for gram in _grams(normalized):
+            self._grams[gram].add(group_id)
+
+    def remove(self, group_id: str):
+        if group_id not in self._names:
+            return
+        normalized, _ = self._names.pop(group_id)
+        for gram in _grams(normalized):
+            ids = self._grams[gram]
+            ids.discard(group_id)
+            if not ids:
+                del self._grams[gram]
+
+    def _candidates(self, query: str) -> Set[str]:
+        if len(query) <= GRAM_SIZE:
+            return self._grams.get(query, set())
+        trigrams = sorted(
+            (self._grams.get(query[start:start + GRAM_SIZE], set()) for start in range(len(query) - GRAM_SIZE + 1)),
+            key=len
+        )
+        candidates = set(trigrams[0])
+        for ids in trigrams[1:]:
+            candidates &= ids
+            if not candidates:
+                break
+        return {group_id for group_id in candidates if query in self._names[group_id][0]}
+
+    def search(self, query: str, limit: int = 25) -> List[Tuple[str, str]]:
+        query = normalize_text(query)
+        if not query:
+            best = heapq.nsmallest(limit, self._names, key=lambda group_id: self._names[group_id][0])
+            return [(group_id, self._names[group_id][1]) for group_id in best]
+
+        def rank(group_id: str):
+            normalized = self._names[group_id][0]
+            # Exact matches first, then the earliest and tightest substring matches
+            return normalized != query, normalized.find(query), len(normalized), normalized
+
+        best = heapq.nsmallest(limit, self._candidates(query), key=rank)
+        return [(group_id, self._names[group_id][1]) for group_id in best]
@@ -0,0 +1,101 @@
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, List, Optional
+
+import discord
+
+# Upper bounds in seconds of the loop lag histogram buckets, the last bucket catches everything above
+LAG_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class LoopWatchdog:
+    def __init__(self, bot, interval: float = 0.25, threshold: float = 1.0, cooldown: float = 300):
+        self.bot = bot
+        self.interval = interval
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.log = logging.getLogger("watchdog")
+        self.buckets: List[int] = [0] * (len(LAG_BUCKETS) + 1)
+        self.max_lag = 0.0
+        self.slow: Deque[dict] = deque(maxlen=20)
+        # What the loop was last asked to handle, the best guess at what blocked it
+        self.context: Optional[str] = None
+        self._beat = time.monotonic()
+        self._stack: Optional[str] = None
+        self._alerted_at = 0.0
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def on_interaction(self, interaction: discord.Interaction):
+        if custom_id := (interaction.data or {}).get("custom_id"):
+            self.context = f"{custom_id} ({interaction.id})"
+        elif interaction.command:
+            self.context = f"/{interaction.command.qualified_name} ({interaction.id})"
+
+    def record(self, lag: float):
+        self.buckets[bisect.bisect_left(LAG_BUCKETS, lag)] += 1
+        self.max_lag = max(self.max_lag, lag)
+
+    @property
+    def histogram(self) -> dict:
+        labels = [f"<={bound * 1000:g}ms" for bound in LAG_BUCKETS] + [f">{LAG_BUCKETS[-1] * 1000:g}ms"]
+        return dict(zip(labels, self.buckets))
+
+    async def _measure(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            lag = self._beat - start - self.interval
+            self.record(lag)
+            if lag >= self.threshold:
+                self._report(lag)
+
+    def _watch(self):
+        # Runs on its own thread so it can look at the loop's stack while the loop is stuck
+        while not self._stopped.wait(self.interval):
+            if self._stack is None and time.monotonic() - self._beat > self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._stack = "".join(traceback.format_stack(frame))
+
+    def _report(self, lag: float):
+        stack, self._stack = self._stack, None
+        event = {"lag": lag, "context": self.context, "stack": stack, "at": time.time()}
+        self.slow.append(event)
+        self.log.warning(f"Event loop blocked for {lag * 1000:.0f}ms while handling {self.context or 'nothing'}")
+        if time.monotonic() - self._alerted_at < self.cooldown:
+            return
+        errors = self.bot.get_cog("Errors")
+        if errors is None:
+            return
+        self._alerted_at = time.monotonic()
+        em = discord.Embed(
+            color=self.bot.config.colors["error"],
+            title=f"Event loop blocked for {lag * 1000:.0f}ms",
+            description=f"**Last interaction:** {self.context or 'None'}"
+        )
+        em.add_field(name="Histogram:", value="\n".join(f"{k}: {v}" for k, v in self.histogram.items() if v))
+        errors.reporter.alert(em, stack)
@@ -21,4 +21,24 @@ home_guild = 123
 # 'main' is the primary color of the bot.
 # 'error' is the color used for error messages.
 # 'success' is the color used for success messages.
-colors = {"main": discord.Color.blue(), "error": discord.Color.red(), "success": discord.Color.green()}
\ No newline at end of file
+colors = {"main": discord.Color.blue(), "error": discord.Color.red(), "success": discord.Color.green()}
+
+# 'persistent_menus' makes /group list use stateless buttons that keep working across restarts.
+# Set it to False to use the older in-memory paginator.
+persistent_menus = True
+
+# 'group_staleness' is how many seconds an already loaded group can be reused for its info embed before it's refetched.
+group_staleness = 30
+
+# 'sentry_sampling' controls how many Sentry transactions are traced and profiled. SENTRY_<KEY> environment variables
+# override these, e.g. SENTRY_TRACES=0.5. 'hot' applies to button callbacks, transactions slower than 'slow_ms' or that
+# raised an error are always sampled for a while, and busy transactions are capped near 'target_per_minute'.
+sentry_sampling = {"traces": 0.1, "profiles": 0.1, "hot": 0.01, "slow_ms": 2000, "target_per_minute": 60}
+
+# 'chunk_members' downloads and caches every member of every guild at startup. Set it to False to only fetch the
+# members of a group when they're needed, keeping at most 'member_cache_size' of them cached.
+chunk_members = True
+member_cache_size = 10000
+
+# Seconds the event loop can be blocked for before the stack is captured and reported to the error webhook
+loop_lag_threshold = 1.0
@@ -1,15 +1,21 @@
 import asyncio
+import atexit
 import logging
 import os
+import queue
 import shutil
 import signal
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueListener, RotatingFileHandler
 
 import coloredlogs
 import sentry_sdk
 import yaml
 from dotenv import load_dotenv
 
+from common.functions.cluster import ClusterManager, recommended_shards
+from common.functions.logs import DeferredQueueHandler, JsonFormatter
+from common.functions.sampling import TraceSampler, sampling_config
+
 log = logging.getLogger("bot")
 
 
@@ -35,7 +41,7 @@ def validate_config():
     return env_exists
 
 
-def setup_logger():
+def setup_logger(log_file="logs/bot.log"):
     logger = logging.getLogger()
 
     created = []
@@ -43,34 +49,47 @@ def setup_logger():
         shutil.copy("config/logging.example.yml", "config/logging.yml")
         created.append("config/logging.yml")
 
-    if not os.path.exists("logs/bot.log"):
+    if not os.path.exists(log_file):
         if not os.path.exists("logs"):
             os.mkdir("logs")
-        open("logs/bot.log", "x")
-        created.append("logs/bot.log")
+        open(log_file, "x")
+        created.append(log_file)
 
     with open("config/logging.yml", "r") as log_config:
         config = yaml.safe_load(log_config)
 
-    coloredlogs.install(
-        level="INFO",
-        logger=logger,
+    console_options = dict(
         fmt=config["formats"]["console"],
         datefmt=config["formats"]["datetime"],
         level_styles=config["levels"],
         field_styles=config["fields"]
     )
-
     max_bytes = int(config["file"]["max_MiB"]) * 1024 * 1024
     file = RotatingFileHandler(
-        filename="logs/bot.log",
+        filename=log_file,
         encoding="utf-8",
         maxBytes=max_bytes,
         backupCount=int(config["file"]["backup_count"]),
     )
-    file.setFormatter(logging.Formatter(config["formats"]["file"]))
-    file.setLevel(logging.WARNING)
-    logger.addHandler(file)
+    if config.get("json"):
+        file.setFormatter(JsonFormatter(datefmt=config["formats"]["datetime"]))
+    else:
+        file.setFormatter(logging.Formatter(config["formats"]["file"]))
+    file.setLevel(config["file"].get("level", "WARNING"))
+
+    if config.get("queue"):
+        # Formatting, console writes and file rotation happen on the listener thread, off the event loop
+        console = logging.StreamHandler()
+        console.setFormatter(coloredlogs.ColoredFormatter(**console_options))
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, console, file, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.setLevel(logging.INFO)
+        logger.addHandler(DeferredQueueHandler(log_queue))
+    else:
+        coloredlogs.install(level="INFO", logger=logger, **console_options)
+        logger.addHandler(file)
 
     msg = "Successfully setup the logger"
     if created:
@@ -90,11 +109,23 @@ def before_send(event, hint):
 
 
 def init_sentry(client):
+    options = sampling_config(client.config)
+    sampler = TraceSampler.from_config(options)
+
+    def send_error(event, hint):
+        event = before_send(event, hint)
+        # Whatever transaction an error happened in gets fully sampled for a while
+        if event:
+            sampler.flag(event.get("transaction"))
+        return event
+
     sentry_sdk.init(
         os.getenv("SENTRY_URL"),
-        before_send=before_send,
-        traces_sample_rate=1.0,
-        profiles_sample_rate=1.0,
+        before_send=send_error,
+        before_send_transaction=sampler.before_send_transaction,
+        sample_rate=1.0,
+        traces_sampler=sampler,
+        profiles_sample_rate=options["profiles"],
         environment="Development" if client.debug else "Production",
         max_breadcrumbs=50,
         release=client.version["bot"],
@@ -105,6 +136,26 @@ def signal_handler(signum, frame):
     asyncio.create_task(bot.close(signum, frame))
 
 
+def run_bot(**options):
+    global bot
+    from bot import Bot
+    bot = Bot(**options)
+    init_sentry(bot)
+    try:
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
+        bot.run(os.getenv("TOKEN"), log_handler=None)
+    except Exception as e:
+        log.error(e)
+
+
+def run_cluster(cluster_id, shard_ids, shard_count, conn):
+    # Runs in a fresh process started by the ClusterManager
+    setup_logger(f"logs/cluster-{cluster_id}.log")
+    load_dotenv(os.path.join(os.path.dirname(__file__), "config/.env"))
+    run_bot(shard_ids=shard_ids, shard_count=shard_count, cluster_id=cluster_id, ipc=conn)
+
+
 if __name__ == "__main__":
     setup_logger()
     ready = validate_config()
@@ -116,11 +167,12 @@ if __name__ == "__main__":
         log.error("Please fill out config/.env before starting the bot")
         exit(1)
 
-    from bot import Bot
-    bot = Bot()
-    init_sentry(bot)
-    try:
-        signal.signal(signal.SIGINT, signal_handler)
-        bot.run(os.getenv("TOKEN"), log_handler=None)
-    except Exception as e:
-        log.error(e)
+    clusters = int(os.getenv("CLUSTERS") or 1)
+    shard_count = int(os.getenv("SHARD_COUNT") or 0) or None
+    if clusters > 1:
+        shard_count = shard_count or asyncio.run(recommended_shards(os.getenv("TOKEN")))
+        manager = ClusterManager(run_cluster, shard_count, clusters)
+        log.info(f"Starting {len(manager.clusters)} clusters for {shard_count} shards")
+        manager.run()
+    else:
+        run_bot(shard_count=shard_count)
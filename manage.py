@@ -1,6 +1,9 @@
-import click
+import asyncio
 import os
 
+import click
+from dotenv import load_dotenv
+
 
 @click.group(invoke_without_command=True)
 def main():
@@ -12,5 +15,33 @@ def makerequirements():
     os.system("pipenv requirements > requirements.txt")
 
 
+@main.command()
+def migrategroups():
+    load_dotenv(os.path.join(os.path.dirname(__file__), "config/.env"))
+    from common.database import Database
+
+    async def migrate():
+        db = await Database.create()
+        migrated = await db.migrate_groups()
+        await db.close()
+        click.echo(f"Migrated {migrated} groups")
+
+    asyncio.run(migrate())
+
+
+@main.command()
+def rebuildmemberships():
+    load_dotenv(os.path.join(os.path.dirname(__file__), "config/.env"))
+    from common.database import Database
+
+    async def rebuild():
+        db = await Database.create()
+        await db.rebuild_memberships()
+        await db.close()
+        click.echo("Rebuilt the memberships index")
+
+    asyncio.run(rebuild())
+
+
 if __name__ == "__main__":
     main()
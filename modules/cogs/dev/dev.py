@@ -27,3 +27,34 @@ class Dev(commands.Cog):
             else:
                 ret += 1
         await ctx.send(f"Synced the tree to {ret}/{len(guilds.split(','))}")
+
+    @commands.hybrid_command(name="cachestats", hidden=True)
+    @commands.is_owner()
+    async def cache_stats(self, ctx: commands.Context):
+        stats = ctx.bot.db.cache.stats
+        await ctx.send("\n".join(f"**{key.title()}:** {value}" for key, value in stats.items()))
+
+    @commands.hybrid_command(name="clusters", hidden=True)
+    @commands.is_owner()
+    async def clusters(self, ctx: commands.Context, restart: bool = False):
+        if not ctx.bot.cluster:
+            return await ctx.send("Not running as a cluster.")
+        if restart:
+            ctx.bot.cluster.request_restart()
+            return await ctx.send("Requested a rolling restart of all clusters.")
+        lines = [
+            f"**Cluster {cluster_id}:** {'ready' if stats['ready'] else 'starting'}, shards {stats.get('shards', [])}, "
+            f"{stats.get('guilds', 0)} guilds, {stats.get('latency', 0) * 1000:.0f}ms"
+            for cluster_id, stats in sorted(ctx.bot.cluster.clusters.items())
+        ]
+        await ctx.send("\n".join(lines) or "No cluster stats received yet.")
+
+    @commands.hybrid_command(name="looplag", hidden=True)
+    @commands.is_owner()
+    async def loop_lag(self, ctx: commands.Context):
+        watchdog = ctx.bot.watchdog
+        lines = [f"**{bucket}:** {count}" for bucket, count in watchdog.histogram.items()]
+        lines.append(f"**Max:** {watchdog.max_lag * 1000:.0f}ms")
+        for event in list(watchdog.slow)[-5:]:
+            lines.append(f"<t:{int(event['at'])}:R> {event['lag'] * 1000:.0f}ms during {event['context'] or 'nothing'}")
+        await ctx.send("\n".join(lines))
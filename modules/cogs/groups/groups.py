@@ -1,10 +1,12 @@
+from typing import Literal
+
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 from bot import Bot
-from common.functions.paginator import IndexedGroupPages
-from common.functions.text import pagify
+from common.functions.paginator import IndexedGroupPages, IndexedPagesInteraction
+from common.functions.ping import PingCancelView, PingJob, pack_mentions
 
 
 class Groups(commands.Cog):
@@ -14,16 +16,36 @@ class Groups(commands.Cog):
     group = app_commands.Group(name="group", description="Commands for managing groups.")
 
     @group.command(name="list", description="List all groups.")
-    async def group_list(self, interaction: discord.Interaction):
+    @app_commands.describe(sort="How to order the groups")
+    async def group_list(self, interaction: discord.Interaction, sort: Literal["name", "members"] = "name"):
         await interaction.response.defer(thinking=True)
+        if getattr(self.bot.config, "persistent_menus", True):
+            from common.functions.groups import build_group_list
+            em, view = await build_group_list(interaction, 0, sort)
+            if not view.children:
+                return await interaction.followup.send("No groups", ephemeral=True)
+            return await interaction.followup.send(embed=em, view=view)
         guild = await self.bot.db.get_guild(str(interaction.guild_id))
         if not guild.groups:
             return await interaction.followup.send("No groups", ephemeral=True)
         em = discord.Embed(color=self.bot.config.colors["main"], title="Groups")
         em.set_thumbnail(url=interaction.guild.icon.with_static_format("png").with_size(512).url)
-        pages = IndexedGroupPages(entries=guild.groups, interaction=interaction, embed=em)
+        entries = guild.groups
+        if sort == "members":
+            entries = sorted(entries, key=lambda x: len(x.members), reverse=True)
+        pages = IndexedGroupPages(entries=entries, interaction=interaction, embed=em)
         await pages.start()
 
+    @group.command(name="mine", description="List the groups you're in.")
+    async def group_mine(self, interaction: discord.Interaction):
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        groups = await self.bot.db.get_member_groups(str(interaction.guild_id), str(interaction.user.id))
+        if not groups:
+            return await interaction.followup.send("You're not in any groups!", ephemeral=True)
+        em = discord.Embed(color=self.bot.config.colors["main"], title="Your Groups")
+        pages = IndexedPagesInteraction(entries=[group.name for group in groups], interaction=interaction, embed=em)
+        await pages.start(ephemeral=True)
+
     @group.command(name="ping", description="Ping a group.")
     @app_commands.describe(group="The group to ping")
     async def group_ping(self, interaction: discord.Interaction, group: str):
@@ -31,18 +53,41 @@ class Groups(commands.Cog):
         group = await self.bot.db.get_group(str(interaction.guild_id), group)
         if not group:
             return await interaction.followup.send("Group not found!", ephemeral=True)
-        members = group.get_members(interaction.guild)
-        if not members:
+        header = f"**@{interaction.user.mention}:** **@{group.name}:** "
+        role = interaction.guild.get_role(int(group.role_id)) if group.role_id else None
+        if role and (role.mentionable or interaction.channel.permissions_for(interaction.guild.me).mention_everyone):
+            await interaction.channel.send(header + role.mention, allowed_mentions=discord.AllowedMentions(roles=[role]))
+            return await interaction.followup.send("Done!")
+        if interaction.guild.chunked:
+            mentions = [x.mention for x in group.get_members(interaction.guild)]
+        else:
+            # Mentions only need IDs, so don't spend gateway requests resolving every member
+            mentions = [f"<@{member_id}>" for member_id in group.member_ids]
+        if not mentions:
             return await interaction.followup.send("No members to ping!", ephemeral=True)
-        content = f"**@{interaction.user.mention}:** **@{group.name}:** "
-        content += ", ".join(x.mention for x in members)
-        if pages := pagify(content, delims=[", "]):
-            for page in pages:
-                await interaction.channel.send(
-                    page,
-                    allowed_mentions=discord.AllowedMentions(users=True, everyone=False, roles=False)
-                )
-        await interaction.followup.send("Done!")
+        pages = pack_mentions(header, mentions)
+
+        async def report(ping: PingJob):
+            await message.edit(content=f"Sent {ping.sent}/{ping.total} messages...")
+
+        job = PingJob(interaction.channel, pages, progress=report)
+        view = PingCancelView(job)
+        message = await interaction.followup.send(f"Sent 0/{job.total} messages...", view=view, wait=True)
+        try:
+            self.bot.pings.submit(job)
+            await job.finished.wait()
+        finally:
+            view.stop()
+        if job.error:
+            content = f"Failed after {job.sent}/{job.total} messages: {job.error.text}"
+        elif job.cancelled:
+            content = f"Cancelled after {job.sent}/{job.total} messages."
+        else:
+            content = "Done!"
+        try:
+            await message.edit(content=content, view=None)
+        except discord.HTTPException:
+            pass
 
     @group.command(name="info", description="Get info about a group.")
     @app_commands.describe(group="The name of the group")
@@ -72,17 +117,40 @@ class Groups(commands.Cog):
     async def group_delete(self, interaction: discord.Interaction, group: str):
         await interaction.response.defer(thinking=True, ephemeral=True)
         guild = await self.bot.db.get_guild(str(interaction.guild_id))
+        to_delete = next((x for x in guild.groups if x.id == group), None)
+        if to_delete and to_delete.role_id and (role := interaction.guild.get_role(int(to_delete.role_id))):
+            await role.delete(reason=f"Group {to_delete.name} deleted")
         await guild.delete_group(group)
         await interaction.followup.send("Done!")
 
+    @group.command(name="role", description="Toggle mirroring a group as a role, so pings use one role mention.")
+    @app_commands.describe(group="The name of the group")
+    @app_commands.checks.has_permissions(manage_roles=True)
+    @app_commands.checks.bot_has_permissions(manage_roles=True)
+    async def group_role(self, interaction: discord.Interaction, group: str):
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        group = await self.bot.db.get_group(str(interaction.guild_id), group)
+        if not group:
+            return await interaction.followup.send("Group not found!", ephemeral=True)
+        if group.role_id:
+            if role := interaction.guild.get_role(int(group.role_id)):
+                await role.delete(reason=f"Stopped mirroring group {group.name}")
+            await group.update_fields(role_id=None)
+            return await interaction.followup.send(f"`{group.name}` is no longer mirrored as a role.")
+        role = await interaction.guild.create_role(
+            name=group.name, mentionable=True, reason=f"Mirroring group {group.name}"
+        )
+        await group.update_fields(role_id=str(role.id))
+        self.bot.role_sync.queue_group(group)
+        await interaction.followup.send(f"`{group.name}` is now mirrored as {role.mention}, members are being synced.")
+
     @group_info.autocomplete("group")
     @group_ping.autocomplete("group")
     @group_delete.autocomplete("group")
+    @group_role.autocomplete("group")
     async def group_info_autocomplete(self, interaction: discord.Interaction, current: str):
-        current = current.lower()
-        data = await self.bot.db.get_guild(str(interaction.guild_id))
-        groups = []
-        for group in data.groups:
-            if not current or current in group.name.lower():
-                groups.append(app_commands.Choice(name=group.name, value=group.id))
-        return groups
+        guild = await self.bot.db.get_guild(str(interaction.guild_id))
+        return [
+            app_commands.Choice(name=name, value=group_id)
+            for group_id, name in guild.search_index.search(current)
+        ]
@@ -55,4 +55,13 @@ class Commands(commands.Cog):
                 for option in data["options"][0]["options"]:
                     # noinspection PyTypeChecker
                     command += f" {option['name']}: {option['value']}"
-            self.bot.log.info(f"{interaction.user} in {location}: {command}")
+            latency = (discord.utils.utcnow() - interaction.created_at).total_seconds() * 1000
+            self.bot.log.info(
+                f"{interaction.user} in {location}: {command}",
+                extra={
+                    "interaction_id": interaction.id,
+                    "guild": interaction.guild_id,
+                    "command": command,
+                    "latency": round(latency, 2)
+                }
+            )
@@ -1,4 +1,3 @@
-import os
 import traceback
 from datetime import datetime, timedelta
 
@@ -8,22 +7,25 @@ from discord import app_commands
 from discord.ext import commands
 
 from bot import Bot
-from common.functions.text import pagify
+from .reporter import ErrorReporter
 
 
 class Errors(commands.Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
         self._old_tree_error = None
+        self.reporter = ErrorReporter(bot)
 
     def cog_load(self):
         tree = self.bot.tree
         self._old_tree_error = tree.on_error
         tree.on_error = self.on_app_command_error
+        self.reporter.start()
 
     def cog_unload(self):
         tree = self.bot.tree
         tree.on_error = self._old_tree_error
+        self.reporter.stop()
 
     @staticmethod
     def float_to_discord_timestamp(seconds):
@@ -39,7 +41,6 @@ class Errors(commands.Cog):
             return await interaction.response.send_message(f"You don't have permission to use this command!",
                                                            ephemeral=True)
         sentry_sdk.capture_exception(error)
-        webhook = discord.Webhook.from_url(os.getenv("ERROR_WEBHOOK"), session=self.bot.session)
 
         long = "".join(traceback.format_exception(type(error), error, error.__traceback__))
         self.bot.log.error(long)
@@ -73,10 +74,7 @@ class Errors(commands.Cog):
         else:
             em.add_field(name="Location:", value="Private messages-")
 
-        await webhook.send(embed=em)
-        if pages := pagify(long):
-            for page in pages:
-                await webhook.send(f"```py\n{page}\n```")
+        self.reporter.report(error, em, long)
 
     @commands.Cog.listener()
     async def on_command_error(self, ctx: commands.Context, error: commands.CommandError):
@@ -106,7 +104,6 @@ class Errors(commands.Cog):
             return await ctx.reply(str(error))
 
         sentry_sdk.capture_exception(error)
-        webhook = discord.Webhook.from_url(os.getenv("ERROR_WEBHOOK"), session=self.bot.session)
 
         long = "".join(traceback.format_exception(type(error), error, error.__traceback__))
         self.bot.log.error(long)
@@ -126,8 +123,4 @@ class Errors(commands.Cog):
         else:
             em.add_field(name="Location:", value="Private messages-")
 
-        await webhook.send(embed=em)
-
-        if pages := pagify(long):
-            for page in pages:
-                await webhook.send(f"```py\n{page}\n```")
+        self.reporter.report(error, em, long)
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+import traceback
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import discord
+
+from common.functions.cache import LRUCache
+from common.functions.text import pagify
+
+
+class ErrorReporter:
+    def __init__(self, bot, summary_interval: float = 60, forget_after: float = 3600, max_queued: int = 100):
+        self.bot = bot
+        self.summary_interval = summary_interval
+        self.log = logging.getLogger("errors")
+        # Fingerprints that were already sent in full; they're sent in full again once they expire
+        self._known = LRUCache(maxsize=1024, ttl=forget_after)
+        self._repeats: Counter = Counter()
+        self._dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self._tasks: List[asyncio.Task] = []
+        self._webhook: Optional[discord.Webhook] = None
+
+    @property
+    def webhook(self) -> Optional[discord.Webhook]:
+        if self._webhook is None and os.getenv("ERROR_WEBHOOK"):
+            self._webhook = discord.Webhook.from_url(os.getenv("ERROR_WEBHOOK"), session=self.bot.session)
+        return self._webhook
+
+    @staticmethod
+    def fingerprint(error: BaseException) -> Tuple[str, str]:
+        # Command errors arrive wrapped in CommandInvokeError, whose traceback ends inside discord.py
+        error = getattr(error, "original", None) or error.__cause__ or error
+        frames = traceback.extract_tb(error.__traceback__)
+        location = f"{frames[-1].filename}:{frames[-1].lineno}" if frames else ""
+        return type(error).__name__, location
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._send_loop()), asyncio.create_task(self._summary_loop())]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def report(self, error: BaseException, embed: discord.Embed, long: str):
+        fingerprint = self.fingerprint(error)
+        if fingerprint in self._known:
+            # Refreshing the entry means it's only sent in full again after an hour without repeats
+            self._known.set(fingerprint, True)
+            self._repeats[fingerprint] += 1
+            return
+        self._known.set(fingerprint, True)
+        self._enqueue(embed, long)
+
+    def alert(self, embed: discord.Embed, long: Optional[str] = None):
+        self._enqueue(embed, long)
+
+    def _enqueue(self, embed: discord.Embed, long: Optional[str]):
+        try:
+            self._queue.put_nowait((embed, long))
+        except asyncio.QueueFull:
+            self._dropped += 1
+
+    async def _send_loop(self):
+        while True:
+            embed, long = await self._queue.get()
+            try:
+                if self.webhook is None:
+                    continue
+                await self.webhook.send(embed=embed)
+                if long and (pages := pagify(long)):
+                    for page in pages:
+                        await self.webhook.send(f"```py\n{page}\n```")
+            except discord.HTTPException as e:
+                self.log.error(f"Failed to send an error report: {e}")
+            except Exception as e:
+                # This is the only sender, so it has to survive anything a report can throw
+                self.log.exception(f"Unexpected error sending an error report: {e}")
+
+    async def _summary_loop(self):
+        while True:
+            await asyncio.sleep(self.summary_interval)
+            if not self._repeats and not self._dropped:
+                continue
+            repeats, self._repeats = self._repeats, Counter()
+            dropped, self._dropped = self._dropped, 0
+            lines = [
+                f"`{name}` at `{location}`: **{count}** more" for (name, location), count in repeats.most_common(20)
+            ]
+            if len(repeats) > 20:
+                lines.append(f"...and {len(repeats) - 20} more kinds of errors")
+            if dropped:
+                lines.append(f"**{dropped}** reports were dropped because the queue was full")
+            em = discord.Embed(
+                color=self.bot.config.colors["error"],
+                title=f"Repeated errors in the last {int(self.summary_interval)}s:",
+                description="\n".join(lines)
+            )
+            self._enqueue(em, None)